@@ -1,8 +1,15 @@
 from PIL import Image
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rasterizer.raster import new_buffers
+from rasterizer.trilist import draw_triangle_list
 
 # === CONFIG ===
 WIDTH, HEIGHT = 1024, 1024
 BACKGROUND_COLOR = (0, 0, 0)
+Z_BUFFER = True  # per-pixel depth test on all triangles at once; False draws back to front (painter's sort)
 
 # === SETUP IMAGE ===
 image = Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND_COLOR)
@@ -62,22 +69,31 @@ def draw_triangle(screen_coords, color):
                 pixels[x, y] = color
 
 # === MAIN PIPELINE ===
-projected_triangles = []
-
-for tri in triangles:
-    verts = tri[:3]
-    color = tri[3]
-    projected = [perspective_project(v) for v in verts]
-    screen_coords = [to_screen(x, y) for (x, y, inv_z) in projected]
-    avg_inv_z = sum(inv_z for (_, _, inv_z) in projected) / 3
-    projected_triangles.append((avg_inv_z, screen_coords, color))
-
-# Sort by depth: draw farthest (lowest 1/z) first
-projected_triangles.sort(key=lambda t: t[0])
-
-# Rasterize all triangles
-for _, tri_2d, color in projected_triangles:
-    draw_triangle(tri_2d, color)
+def draw_painter():
+    projected_triangles = []
+
+    for tri in triangles:
+        verts = tri[:3]
+        color = tri[3]
+        projected = [perspective_project(v) for v in verts]
+        screen_coords = [to_screen(x, y) for (x, y, inv_z) in projected]
+        avg_inv_z = sum(inv_z for (_, _, inv_z) in projected) / 3
+        projected_triangles.append((avg_inv_z, screen_coords, color))
+
+    # Sort by depth: draw farthest (lowest 1/z) first
+    projected_triangles.sort(key=lambda t: t[0])
+
+    # Rasterize all triangles
+    for _, tri_2d, color in projected_triangles:
+        draw_triangle(tri_2d, color)
+
+if Z_BUFFER:
+    # Same projection and edge test, vectorized; the nearest triangle wins per pixel
+    color_buffer, z_buffer = new_buffers(WIDTH, HEIGHT, BACKGROUND_COLOR)
+    draw_triangle_list(triangles, color_buffer, z_buffer)
+    image = Image.fromarray(color_buffer)
+else:
+    draw_painter()
 
 # === SAVE & SHOW ===
 image.save("project_p2_result_3.png")
@@ -1,170 +1,137 @@
-import pywavefront
-from PIL import Image
-import math
-import numpy as np
-from collections import defaultdict
+import argparse
+import functools
+import inspect
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from rasterizer.framecache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, FrameCache, frame_key
+from rasterizer.instrument import Instrumentation, stage
+from rasterizer.keyframes import Animation, load_animation, parse_frame_range, parse_shard, shard_frames
+from rasterizer.parallel import Progress, default_workers, open_pool, render_frames
+from rasterizer.renderer import Renderer
+from rasterizer.scene import Camera, Light, Material, Mesh
+from rasterizer.transform import build_transformation_matrix
+from rasterizer.video import FrameWriter
 
 # === CONFIG ===
 WIDTH, HEIGHT = 1024, 1024
-TOTAL_FRAMES = 60  # for a full 360° rotation
-
-# === LIGHTING & MATERIAL ===
-class Light:
-    def __init__(self, position, intensity=(1, 1, 1)):
-        self.position = position
-        self.intensity = intensity
-
-class Material:
-    def __init__(self, diffuse, specular, shininess):
-        self.diffuse = diffuse
-        self.specular = specular
-        self.shininess = shininess
-
-light = Light(position=(0, 0, 2), intensity=(1, 1, 1))
-material = Material(diffuse=(0.8, 0.1, 0.1), specular=(1.0, 1.0, 1.0), shininess=32)
-
-# === LOAD MODEL ===
-pywavefront.logger.setLevel('ERROR')
-scene = pywavefront.Wavefront('man.obj', collect_faces=True, create_materials=True, parse=True, strict=False)
-
-# === NORMALIZATION ===
-all_vertices = [np.array(v[:3]) for v in scene.vertices]
-min_bound = np.min(all_vertices, axis=0)
-max_bound = np.max(all_vertices, axis=0)
-center = (min_bound + max_bound) / 2
-scale = 2.5 / np.max(max_bound - min_bound)
-translation = np.array([0.0, 0.0, 2.5])
-
-# === TRANSFORMATIONS ===
-def build_transformation_matrix(angle_deg, scale_factor, translation_vec):
-    angle_rad = math.radians(angle_deg)
-    cos_a, sin_a = math.cos(angle_rad), math.sin(angle_rad)
-
-    S = np.diag([scale_factor, scale_factor, scale_factor, 1.0])
-    R = np.array([
-        [cos_a, 0, sin_a, 0],
-        [0,     1, 0,     0],
-        [-sin_a,0, cos_a, 0],
-        [0,     0, 0,     1]
-    ])
-    T = np.identity(4)
-    T[:3, 3] = translation_vec
-    return T @ R @ S
-
-def transform_vertex(v, matrix):
-    vec = np.array([v[0], v[1], v[2], 1.0])
-    result = matrix @ vec
-    return tuple(result[:3])
-
-# === VECTOR UTILS ===
-def subtract(a, b): return tuple(a[i] - b[i] for i in range(3))
-def dot(a, b): return sum(a[i] * b[i] for i in range(3))
-def normalize_vector(v):
-    length = math.sqrt(dot(v, v))
-    return tuple(c / length for c in v) if length != 0 else (0, 0, 0)
-def reflect(L, N):
-    dotLN = dot(L, N)
-    return tuple(2 * dotLN * N[i] - L[i] for i in range(3))
-
-# === VERTEX NORMALS (same across all frames) ===
-vertex_normals = defaultdict(lambda: [0, 0, 0])
-for mesh in scene.mesh_list:
-    for face in mesh.faces:
-        if len(face) == 3:
-            v0 = (scene.vertices[face[0]][0:3] - center) * scale
-            v1 = (scene.vertices[face[1]][0:3] - center) * scale
-            v2 = (scene.vertices[face[2]][0:3] - center) * scale
-            edge1 = subtract(v1, v0)
-            edge2 = subtract(v2, v0)
-            face_normal = (
-                edge1[1]*edge2[2] - edge1[2]*edge2[1],
-                edge1[2]*edge2[0] - edge1[0]*edge2[2],
-                edge1[0]*edge2[1] - edge1[1]*edge2[0]
-            )
-            for idx in face:
-                for i in range(3):
-                    vertex_normals[idx][i] += face_normal[i]
-
-for idx in vertex_normals:
-    vertex_normals[idx] = normalize_vector(vertex_normals[idx])
-
-# === SHADING ===
-def compute_phong_color(pos, normal, material, light):
-    N = normalize_vector(normal)
-    L = normalize_vector(subtract(light.position, pos))
-    V = normalize_vector(tuple(-c for c in pos))
-    if dot(N, L) < 0:
-        N = tuple(-n for n in N)
-    R = reflect(L, N)
-    ambient = (0.1, 0.1, 0.1)
-    diffuse = tuple(material.diffuse[i] * light.intensity[i] * max(dot(N, L), 0) for i in range(3))
-    specular = tuple(material.specular[i] * light.intensity[i] * (max(dot(R, V), 0) ** material.shininess) for i in range(3))
-    color = tuple(min(1, ambient[i] + diffuse[i] + specular[i]) for i in range(3))
-    return tuple(int(c * 255) for c in color)
-
-def project_vertex(v):
-    x, y, z = v
-    if z == 0: z = 1e-5
-    x_proj = x / z
-    y_proj = y / z
-    x_screen = int((x_proj + 1) * WIDTH / 2)
-    y_screen = int((1 - y_proj) * HEIGHT / 2)
-    return (x_screen, y_screen)
-
-def edge_func(a, b, c):
-    return (c[0] - a[0]) * (b[1] - a[1]) - (c[1] - a[1]) * (b[0] - a[0])
-
-def draw_phong(p1, p2, p3, v1, v2, v3, n1, n2, n3, pixels, z_buffer):
-    min_x = max(min(p1[0], p2[0], p3[0]), 0)
-    max_x = min(max(p1[0], p2[0], p3[0]), WIDTH - 1)
-    min_y = max(min(p1[1], p2[1], p3[1]), 0)
-    max_y = min(max(p1[1], p2[1], p3[1]), HEIGHT - 1)
-    area = edge_func(p1, p2, p3)
-    if area == 0: return
-
-    for y in range(min_y, max_y + 1):
-        for x in range(min_x, max_x + 1):
-            p = (x, y)
-            w0 = edge_func(p2, p3, p)
-            w1 = edge_func(p3, p1, p)
-            w2 = edge_func(p1, p2, p)
-            if (w0 >= 0 and w1 >= 0 and w2 >= 0) or (w0 <= 0 and w1 <= 0 and w2 <= 0):
-                alpha = w0 / area
-                beta = w1 / area
-                gamma = w2 / area
-                pos = tuple(alpha * v1[i] + beta * v2[i] + gamma * v3[i] for i in range(3))
-                z = pos[2]
-                if z < z_buffer[y][x]:
-                    z_buffer[y][x] = z
-                    norm = tuple(alpha * n1[i] + beta * n2[i] + gamma * n3[i] for i in range(3))
-                    pixels[x, y] = compute_phong_color(pos, norm, material, light)
+SHADING = 'phong'  # 'flat' (lit once per face) and 'gouraud' (lit once per vertex) are cheaper previews
+DEFERRED_SHADING = False  # True: G-buffer pass first, then one Phong evaluation per visible pixel
+BACKFACE_CULLING = True  # drop triangles facing away from the camera before rasterization
+LEVEL_OF_DETAIL = True  # swap in a simplified mesh when the model covers few pixels
+OCCLUSION_CULLING = False  # hierarchical Z rejection, pays off for scenes with high depth complexity
+SUBPIXEL_BITS = None  # e.g. 8: fixed-point vertices and top-left fill rule, None keeps whole-pixel vertices
+TILE_SIZE = None  # e.g. 64: bin triangles into screen tiles and shade the tiles on a thread pool
+TOTAL_FRAMES = 60  # for a full 360° rotation, unless --animation gives a keyframe file
+
+# === LOAD MODEL (parsed and simplified once, then served from man.obj.cache/) ===
+mesh = Mesh.load('man.obj', size=2.5, lod=LEVEL_OF_DETAIL)
+
+# === RENDERER (frame targets allocated once per process, cleared in place every frame) ===
+# The animation has always lit the model with its normals as loaded, so they do not turn with it
+renderer = Renderer(mesh, None, shading=SHADING, deferred=DEFERRED_SHADING, backface_culling=BACKFACE_CULLING,
+                    occlusion_culling=OCCLUSION_CULLING, tile_size=TILE_SIZE, level_of_detail=LEVEL_OF_DETAIL,
+                    model_space_normals=True)
+
+# === RENDER ONE FRAME ===
+def frame_inputs(camera, light, material):
+    """ Everything that decides a frame's pixels besides the rasterizer code (see framecache.py) """
+    model_view = camera.view @ mesh.model
+    level = mesh.select(model_view, camera.width, camera.height) if renderer.level_of_detail else 0
+    return dict(mesh=mesh.source_sha256, lod_faces=mesh.face_counts[level], transform=model_view, light=light,
+                material=material, size=(camera.width, camera.height), subpixel_bits=camera.subpixel_bits,
+                renderer=renderer.options, pipeline=inspect.getsource(draw_frame))
+
+def render_frame(frame, animation, instrumented=False, cache=None):
+    """
+    Renders one frame of the animation and returns (color_buffer, cull_stats, instrument).
+    Runs in a worker process when --workers > 1. instrument is None unless
+    instrumented=True, then an Instrumentation with the frame's counters and
+    trace events. With a FrameCache, a frame whose inputs were rendered
+    before is loaded instead, and cull_stats is None; instrumented frames
+    always render.
+    """
+    key = animation.at(frame)
+    # The keyframe's rotation, scale and position make up the view; the mesh's model matrix normalizes its size
+    view = build_transformation_matrix(key['angle'], key['scale'], key['translation'])
+    camera = Camera(WIDTH, HEIGHT, view, subpixel_bits=SUBPIXEL_BITS)
+    light = Light(position=key['light'], intensity=key['intensity'])
+    material = Material(diffuse=key['diffuse'], specular=key['specular'], shininess=key['shininess'])
+    if cache is None or instrumented:
+        return draw_frame(frame, camera, light, material, instrumented)
+
+    cache_key = frame_key(**frame_inputs(camera, light, material))
+    color_buffer = cache.get(cache_key)
+    if color_buffer is not None:
+        return color_buffer, None, None
+    color_buffer, stats, instrument = draw_frame(frame, camera, light, material)
+    cache.put(cache_key, color_buffer)
+    return color_buffer, stats, instrument
+
+def draw_frame(frame, camera, light, material, instrumented=False):
+    """
+    Draws one frame through the process's Renderer (rasterizer/renderer.py),
+    which transforms, culls, picks the LOD level and rasterizes. The
+    returned color_buffer is a copy, so the writer may hold it while the
+    next frame is drawn.
+    """
+    instrument = Instrumentation(WIDTH, HEIGHT, overdraw=False) if instrumented else None
+    with stage(instrument, 'frame', frame=frame):
+        color_buffer = renderer.render(camera, light, instrument=instrument, material=material)
+    return color_buffer, renderer.last_stats, instrument
 
 # === ANIMATION FRAME LOOP ===
-for frame in range(TOTAL_FRAMES):
-    angle_deg = (frame / TOTAL_FRAMES) * 360
-    print(f"Rendering frame {frame:03d}...")
-
-    transform = build_transformation_matrix(angle_deg, scale, translation)
-    image = Image.new("RGB", (WIDTH, HEIGHT), "black")
-    pixels = image.load()
-    z_buffer = [[float('inf')] * WIDTH for _ in range(HEIGHT)]
-
-    for mesh in scene.mesh_list:
-        for face in mesh.faces:
-            if len(face) == 3:
-                idx0, idx1, idx2 = face
-                v0 = transform_vertex(scene.vertices[idx0][:3] - center, transform)
-                v1 = transform_vertex(scene.vertices[idx1][:3] - center, transform)
-                v2 = transform_vertex(scene.vertices[idx2][:3] - center, transform)
-
-                n0 = vertex_normals[idx0]
-                n1 = vertex_normals[idx1]
-                n2 = vertex_normals[idx2]
-
-                p0 = project_vertex(v0)
-                p1 = project_vertex(v1)
-                p2 = project_vertex(v2)
-
-                draw_phong(p0, p1, p2, v0, v1, v2, n0, n1, n2, pixels, z_buffer)
-
-    image.save(f"frame_{frame:03d}.png")
+def main():
+    parser = argparse.ArgumentParser(description="Render an animation of man.obj, a 360° turntable by default")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='number of processes rendering frames in parallel (default: all cores)')
+    parser.add_argument('--video', metavar='PATH',
+                        help='encode frames straight into this video (e.g. animation.mp4) instead of PNGs')
+    parser.add_argument('--animation', metavar='PATH',
+                        help='keyframe file (JSON or TOML, see rasterizer/keyframes.py) instead of the turntable')
+    parser.add_argument('--frames', metavar='A:B', help='only render frames A (inclusive) to B (exclusive)')
+    parser.add_argument('--shard', metavar='I/N',
+                        help='only render every N-th frame starting at I (0 <= I < N), to split work across machines')
+    parser.add_argument('--fps', type=int, help='video frame rate (default: from the animation, else 20)')
+    parser.add_argument('--png', action='store_true', help='also write frame_NNN.png when --video is given')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='instrument every frame, print the raster counters and write a Chrome trace here')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help='reuse frames whose inputs did not change from this directory (default: %(default)s)')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_MAX_BYTES >> 20,
+                        help='size limit of the frame cache in MB (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='render every frame, ignoring the frame cache')
+    args = parser.parse_args()
+
+    try:
+        animation = load_animation(args.animation) if args.animation else Animation.turntable(TOTAL_FRAMES)
+        frames = parse_frame_range(args.frames, animation.frames) if args.frames else range(animation.frames)
+        if args.shard:
+            frames = shard_frames(frames, *parse_shard(args.shard))
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    # Frames are named by their number in the whole animation, so shards never collide
+    digits = max(3, len(str(animation.frames - 1)))
+    png_pattern = f"frame_{{:0{digits}d}}.png" if args.png or not args.video else None
+    progress = Progress(len(frames))
+    totals = Instrumentation(WIDTH, HEIGHT, overdraw=False) if args.trace else None
+    cache = None if args.no_cache else FrameCache(args.cache_dir, args.cache_mb << 20)
+    render = functools.partial(render_frame, animation=animation, instrumented=bool(args.trace), cache=cache)
+    workers = min(args.workers, max(len(frames), 1))
+    # The worker processes start before the writer's encoder thread, never after it
+    with open_pool(workers) as pool, FrameWriter(args.video, args.fps or animation.fps, png_pattern) as writer:
+        for frame, (color_buffer, stats, instrument) in render_frames(render, frames, workers, pool=pool):
+            with stage(totals, 'write', frame=frame):
+                writer.write(frame, color_buffer)
+            if instrument is not None:
+                totals.merge(instrument)
+            progress.update(frame, stats if stats is not None else 'cached')
+
+    if totals is not None:
+        print(totals)
+        totals.write_trace(args.trace)
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,28 @@
+import glob
+import re
+
 import imageio.v2 as imageio
 
 # Video writer setup
 output_filename = "animation.mp4"
 fps = 20
-frame_count = 60  # total frames
+
+# Assemble whatever frames exist (e.g. collected from several --shard runs), in frame order
+frames = {}
+for filename in glob.glob("frame_*.png"):
+    match = re.fullmatch(r"frame_(\d+)\.png", filename)
+    if match:
+        frames[int(match.group(1))] = filename
+if not frames:
+    raise SystemExit("No frame_NNN.png files found")
+
+missing = sorted(set(range(max(frames) + 1)) - set(frames))
+if missing:
+    print(f"Warning: {len(missing)} frames missing, first {missing[0]:03d}; the video skips them")
 
 with imageio.get_writer(output_filename, fps=fps) as writer:
-    for frame in range(frame_count):
-        filename = f"frame_{frame:03d}.png"
+    for frame in sorted(frames):
+        filename = frames[frame]
         print(f"Adding {filename} to video...")
         image = imageio.imread(filename)
         writer.append_data(image)
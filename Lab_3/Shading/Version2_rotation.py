@@ -1,180 +1,63 @@
-import pywavefront
 from PIL import Image
-import math
-from collections import defaultdict
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from rasterizer.instrument import Instrumentation, stage
+from rasterizer.renderer import Renderer
+from rasterizer.scene import Camera, Light, Material, Mesh
+from rasterizer.stream import open_stream_writer
 
 # === CONFIG ===
 WIDTH, HEIGHT = 1024, 1024
-image = Image.new("RGB", (WIDTH, HEIGHT), "black")
-pixels = image.load()
-z_buffer = [[float('inf')] * WIDTH for _ in range(HEIGHT)]
+SHADING = 'phong'  # 'flat' (lit once per face) and 'gouraud' (lit once per vertex) are cheaper previews
+DEFERRED_SHADING = False  # True: G-buffer pass first, then one Phong evaluation per visible pixel
+BACKFACE_CULLING = True  # drop triangles facing away from the camera before rasterization
+LEVEL_OF_DETAIL = True  # swap in a simplified mesh when the model covers few pixels
+OCCLUSION_CULLING = False  # hierarchical Z rejection, pays off for scenes with high depth complexity
+SUBPIXEL_BITS = None  # e.g. 8: fixed-point vertices and top-left fill rule, None keeps whole-pixel vertices
+TILE_SIZE = None  # e.g. 64: bin triangles into screen tiles and shade the tiles on a thread pool
+STRIP_HEIGHT = None  # e.g. 64: render bands of rows and stream them into the PNG, for sizes like 16384 x 16384
+INSTRUMENT = False  # print raster counters, save overdraw.png and a Chrome trace (trace.json)
+# The overdraw map is a full-size array, so strip rendering leaves it out
+instrument = Instrumentation(WIDTH, HEIGHT, overdraw=not STRIP_HEIGHT) if INSTRUMENT else None
 
 angle_deg = 200  # Change this to rotate the model left/right
 
 # === LIGHTING ===
-class Light:
-    def __init__(self, position, intensity=(1, 1, 1)):
-        self.position = position
-        self.intensity = intensity
-
-class Material:
-    def __init__(self, diffuse, specular, shininess):
-        self.diffuse = diffuse
-        self.specular = specular
-        self.shininess = shininess
-
 light = Light(position=(2, 2, 0), intensity=(1, 1, 1))
 material = Material(diffuse=(0.8, 0.1, 0.1), specular=(1.0, 1.0, 1.0), shininess=32)
 
-# === LOAD MODEL ===
-pywavefront.logger.setLevel('ERROR')
-scene = pywavefront.Wavefront('man.obj', collect_faces=True, create_materials=True, parse=True, strict=False)
-
-# === NORMALIZE VERTICES ===
-all_vertices = [tuple(v[:3]) for v in scene.vertices]
-min_x = min(v[0] for v in all_vertices)
-max_x = max(v[0] for v in all_vertices)
-min_y = min(v[1] for v in all_vertices)
-max_y = max(v[1] for v in all_vertices)
-min_z = min(v[2] for v in all_vertices)
-max_z = max(v[2] for v in all_vertices)
-
-center = ((min_x + max_x) / 2, (min_y + max_y) / 2, (min_z + max_z) / 2)
-scale = 2.5 / max(max_x - min_x, max_y - min_y, max_z - min_z)
-
-def rotate_y(vertex, angle_deg):
-    x, y, z = vertex
-    angle_rad = math.radians(angle_deg)
-    cos_a = math.cos(angle_rad)
-    sin_a = math.sin(angle_rad)
-    x_new = cos_a * x + sin_a * z
-    z_new = -sin_a * x + cos_a * z
-    return (x_new, y, z_new)
-
-def normalize_vertex(v):
-    x, y, z = v[:3]
-    x = (x - center[0]) * scale
-    y = (y - center[1]) * scale
-    z = (z - center[2]) * scale
-    x, y, z = rotate_y((x, y, z), angle_deg)
-    z += 2.5
-    return (x, y, z)
-
-# === VECTOR MATH ===
-def subtract(a, b): return tuple(a[i] - b[i] for i in range(3))
-def dot(a, b): return sum(a[i] * b[i] for i in range(3))
-def normalize_vector(v):
-    length = math.sqrt(dot(v, v))
-    return tuple(c / length for c in v) if length != 0 else (0, 0, 0)
-def reflect(L, N):
-    dotLN = dot(L, N)
-    return tuple(2 * dotLN * N[i] - L[i] for i in range(3))
-
-# === COMPUTE VERTEX NORMALS ===
-vertex_normals = defaultdict(lambda: [0, 0, 0])
-for mesh in scene.mesh_list:
-    for face in mesh.faces:
-        if len(face) == 3:
-            v0 = normalize_vertex(scene.vertices[face[0]])
-            v1 = normalize_vertex(scene.vertices[face[1]])
-            v2 = normalize_vertex(scene.vertices[face[2]])
-            edge1 = subtract(v1, v0)
-            edge2 = subtract(v2, v0)
-            face_normal = (
-                edge1[1]*edge2[2] - edge1[2]*edge2[1],
-                edge1[2]*edge2[0] - edge1[0]*edge2[2],
-                edge1[0]*edge2[1] - edge1[1]*edge2[0]
-            )
-            for idx in face:
-                for i in range(3):
-                    vertex_normals[idx][i] += face_normal[i]
-
-for idx in vertex_normals:
-    vertex_normals[idx] = normalize_vector(vertex_normals[idx])
-
-# === PHONG SHADING ===
-def compute_phong_color(pos, normal, material, light):
-    N = normalize_vector(normal)
-    L = normalize_vector(subtract(light.position, pos))
-    V = normalize_vector(tuple(-c for c in pos))
-
-    if dot(N, L) < 0:
-        N = tuple(-n for n in N)
-
-    R = reflect(L, N)
-
-    ambient = (0.1, 0.1, 0.1)
-    dot_nl = max(dot(N, L), 0)
-    diffuse = tuple(material.diffuse[i] * light.intensity[i] * dot_nl for i in range(3))
-    dot_rv = max(dot(R, V), 0)
-    specular = tuple(material.specular[i] * light.intensity[i] * (dot_rv ** material.shininess) for i in range(3))
-
-    color = tuple(min(1, ambient[i] + diffuse[i] + specular[i]) for i in range(3))
-    return tuple(int(c * 255) for c in color)
-
-# === PROJECTION ===
-def project_vertex(v):
-    x, y, z = v
-    if z == 0: z = 1e-5
-    x_proj = x / z
-    y_proj = y / z
-    x_screen = int((x_proj + 1) * WIDTH / 2)
-    y_screen = int((1 - y_proj) * HEIGHT / 2)
-    return (x_screen, y_screen)
-
-# === EDGE FUNCTION ===
-def edge_func(a, b, c):
-    return (c[0] - a[0]) * (b[1] - a[1]) - (c[1] - a[1]) * (b[0] - a[0])
-
-# === DRAW TRIANGLES WITH PHONG SHADING & Z-BUFFER ===
-def draw_phong(p1, p2, p3, v1, v2, v3, n1, n2, n3):
-    min_x = max(min(p1[0], p2[0], p3[0]), 0)
-    max_x = min(max(p1[0], p2[0], p3[0]), WIDTH - 1)
-    min_y = max(min(p1[1], p2[1], p3[1]), 0)
-    max_y = min(max(p1[1], p2[1], p3[1]), HEIGHT - 1)
-
-    area = edge_func(p1, p2, p3)
-    if area == 0: return
-
-    for y in range(min_y, max_y + 1):
-        for x in range(min_x, max_x + 1):
-            p = (x, y)
-            w0 = edge_func(p2, p3, p)
-            w1 = edge_func(p3, p1, p)
-            w2 = edge_func(p1, p2, p)
-            if (w0 >= 0 and w1 >= 0 and w2 >= 0) or (w0 <= 0 and w1 <= 0 and w2 <= 0):
-                alpha = w0 / area
-                beta = w1 / area
-                gamma = w2 / area
-
-                pos = tuple(alpha * v1[i] + beta * v2[i] + gamma * v3[i] for i in range(3))
-                z = pos[2]
-
-                if z < z_buffer[y][x]:
-                    z_buffer[y][x] = z
-                    norm = tuple(alpha * n1[i] + beta * n2[i] + gamma * n3[i] for i in range(3))
-                    color = compute_phong_color(pos, norm, material, light)
-                    pixels[x, y] = color
-
-# === MAIN LOOP ===
-for mesh in scene.mesh_list:
-    for face in mesh.faces:
-        if len(face) == 3:
-            idx0, idx1, idx2 = face
-            v0 = normalize_vertex(scene.vertices[idx0])
-            v1 = normalize_vertex(scene.vertices[idx1])
-            v2 = normalize_vertex(scene.vertices[idx2])
-
-            n0 = vertex_normals[idx0]
-            n1 = vertex_normals[idx1]
-            n2 = vertex_normals[idx2]
-
-            p0 = project_vertex(v0)
-            p1 = project_vertex(v1)
-            p2 = project_vertex(v2)
-
-            draw_phong(p0, p1, p2, v0, v1, v2, n0, n1, n2)
+# === LOAD MODEL (parsed and simplified once, then served from man.obj.cache/) ===
+with stage(instrument, 'load'):
+    mesh = Mesh.load('man.obj', size=2.5, lod=LEVEL_OF_DETAIL)
+
+# === RENDER ===
+# Transform, culling, rasterization and shading run inside Renderer.render (rasterizer/renderer.py)
+renderer = Renderer(mesh, material, shading=SHADING, deferred=DEFERRED_SHADING, backface_culling=BACKFACE_CULLING,
+                    occlusion_culling=OCCLUSION_CULLING, tile_size=TILE_SIZE, level_of_detail=LEVEL_OF_DETAIL)
+camera = Camera.turntable(WIDTH, HEIGHT, angle_deg, distance=2.5, subpixel_bits=SUBPIXEL_BITS)
+if STRIP_HEIGHT:
+    # Finished bands go straight to the file; the whole image is never in memory
+    with open_stream_writer("rendered_phong_zbuffer_rotated.png", WIDTH, HEIGHT) as writer:
+        renderer.render_strips(camera, [light], writer, band_height=STRIP_HEIGHT, instrument=instrument)
+    color_buffer = None
+else:
+    # The frame is saved before anything else is rendered, so the framebuffer itself is enough
+    color_buffer = renderer.render(camera, [light], instrument=instrument, copy=False)
+print(renderer.last_stats)
 
 # === OUTPUT ===
-image.save("rendered_phong_zbuffer_rotated.png")
-image.show()
+image = None
+if color_buffer is not None:
+    with stage(instrument, 'encode'):
+        image = Image.fromarray(color_buffer)
+        image.save("rendered_phong_zbuffer_rotated.png")
+
+if instrument is not None:
+    print(instrument)
+    if instrument.overdraw is not None:
+        instrument.save_overdraw("overdraw.png")
+    instrument.write_trace("trace.json")
+if image is not None:
+    image.show()
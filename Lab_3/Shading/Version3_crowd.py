@@ -0,0 +1,66 @@
+from PIL import Image
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from rasterizer.instrument import Instrumentation, stage
+from rasterizer.renderer import Renderer
+from rasterizer.scene import Camera, Light, Material, Mesh
+from rasterizer.transform import build_transformation_matrix
+
+# === CONFIG ===
+WIDTH, HEIGHT = 1024, 1024
+SHADING = 'phong'  # 'flat' and 'gouraud' are cheaper previews, as in Version2_rotation.py
+DEFERRED_SHADING = False  # True: one G-buffer for the whole crowd, lit once per visible pixel
+BACKFACE_CULLING = True
+LEVEL_OF_DETAIL = True  # every instance picks its own level, distant ones draw a few hundred faces
+SUBPIXEL_BITS = None
+INSTRUMENT = False  # print raster counters, save overdraw.png and a Chrome trace (trace.json)
+instrument = Instrumentation(WIDTH, HEIGHT) if INSTRUMENT else None
+
+# === CROWD ===
+COLUMNS, ROWS = 20, 20  # copies of man.obj on a grid in front of the camera
+SPACING = 0.8  # distance between neighbours
+SCALE = 0.4  # size of each copy relative to the 2.5 unit normalized model
+FLOOR_Y = -0.6  # height of the copies' centers, below the eye
+SEED = 607  # random facing per copy
+
+rng = np.random.default_rng(SEED)
+instances = np.array([
+    build_transformation_matrix(rng.uniform(0, 360), SCALE,
+                                ((column - COLUMNS / 2) * SPACING, FLOOR_Y, 3 + row * SPACING))
+    for row in range(ROWS) for column in range(COLUMNS)
+])
+
+# === LIGHTING ===
+light = Light(position=(2, 2, 0), intensity=(1, 1, 1))
+material = Material(diffuse=(0.8, 0.1, 0.1), specular=(1.0, 1.0, 1.0), shininess=32)
+
+# === LOAD MODEL (one shared copy of the geometry for every instance) ===
+with stage(instrument, 'load'):
+    mesh = Mesh.load('man.obj', size=2.5, lod=LEVEL_OF_DETAIL)
+
+# === RENDER ===
+# Frustum culling per instance, then transform, triangle culling and rasterization inside
+# Renderer.render_instances (rasterizer/renderer.py, rasterizer/instancing.py)
+renderer = Renderer(mesh, material, shading=SHADING, deferred=DEFERRED_SHADING, backface_culling=BACKFACE_CULLING,
+                    level_of_detail=LEVEL_OF_DETAIL)
+camera = Camera(WIDTH, HEIGHT, subpixel_bits=SUBPIXEL_BITS)
+color_buffer = renderer.render_instances(camera, [light], instances, instrument=instrument, copy=False)
+print(f"{len(renderer.last_instances)}/{len(instances)} instances in view, "
+      f"faces per level {mesh.face_counts}, instances per level "
+      f"{np.bincount(renderer.last_level, minlength=len(mesh.levels)).tolist()}")
+print(renderer.last_stats)
+
+# === OUTPUT ===
+with stage(instrument, 'encode'):
+    image = Image.fromarray(color_buffer)
+    image.save("rendered_crowd.png")
+
+if instrument is not None:
+    print(instrument)
+    instrument.save_overdraw("overdraw.png")
+    instrument.write_trace("trace.json")
+image.show()
@@ -0,0 +1,138 @@
+"""
+Benchmark: Lab_1 per-pixel triangle fill vs rasterizer.fill.fill_triangles.
+
+Fills random 2D triangles into a black RGB image three ways:
+
+    fullscreen - Lab_1/Version1.py, line_equation on every pixel of the image
+                 for every triangle
+    bbox       - Lab_1/Version2.py, line_equation inside each bounding box
+    batched    - fill_triangles, all triangles per call in NumPy
+
+for triangle counts from 1 to 1e5. The Python loops are only run on the
+first few triangles of a count (--budget seconds per version) and their
+time is extrapolated to the full count; those rows are marked with ~.
+Where a Lab_1 version ran every triangle, its image is compared with the
+batched one.
+
+Usage: python benchmarks/bench_fill.py [--size 1024] [--counts 1,10,100,1000,10000,100000] [--budget 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from rasterizer.fill import fill_triangles  # noqa: E402
+
+DEFAULT_COUNTS = (1, 10, 100, 1000, 10000, 100000)
+
+
+# === REFERENCE (copied from Lab_1/Version1.py and Lab_1/Version2.py) ===
+def line_equation(v1, v2, x, y):
+    """ Determines which side of the line a point (x, y) is on """
+    return (v2[0] - v1[0]) * (y - v1[1]) - (v2[1] - v1[1]) * (x - v1[0])
+
+def fill_lab1(pixels, A, B, C, color, xs, ys):
+    for y in ys:
+        for x in xs:
+            w1 = line_equation(A, B, x, y)
+            w2 = line_equation(B, C, x, y)
+            w3 = line_equation(C, A, x, y)
+            if (w1 >= 0 and w2 >= 0 and w3 >= 0) or (w1 <= 0 and w2 <= 0 and w3 <= 0):
+                pixels[x, y] = color
+
+def draw_fullscreen(pixels, size, A, B, C, color):
+    fill_lab1(pixels, A, B, C, color, range(size), range(size))
+
+def draw_bbox(pixels, size, A, B, C, color):
+    xs = range(min(A[0], B[0], C[0]), max(A[0], B[0], C[0]) + 1)
+    ys = range(min(A[1], B[1], C[1]), max(A[1], B[1], C[1]) + 1)
+    fill_lab1(pixels, A, B, C, color, xs, ys)
+
+def run_batched(triangles, colors, size):
+    image = np.zeros((size, size, 3), dtype=np.uint8)
+    return fill_triangles(image, triangles, colors)
+
+
+# === SCENE ===
+def random_triangles(count, size, rng):
+    """
+    count non-degenerate triangles inside the image. Their size shrinks with
+    the count, so the total covered area stays around a few times the image.
+    """
+    extent = min(size // 2, max(4, int(size * 2 / np.sqrt(count))))
+    corner = rng.integers(0, size - extent, size=(count, 1, 2))
+    triangles = corner + rng.integers(0, extent, size=(count, 3, 2))
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    triangles = triangles[area != 0]
+    colors = rng.integers(1, 256, size=(len(triangles), 3))
+    return triangles, colors
+
+def as_tuples(triangles, colors):
+    return ([tuple(tuple(int(v) for v in p) for p in t) for t in triangles],
+            [tuple(int(v) for v in c) for c in colors])
+
+
+# === TIMING ===
+def time_reference(draw, triangles, colors, size, budget):
+    """
+    Draws triangles one by one until they are done or budget seconds have
+    passed. Returns (seconds for all triangles, image, estimated); image is
+    None and the time extrapolated when the budget ran out first.
+    """
+    image = Image.new("RGB", (size, size), "black")
+    pixels = image.load()
+    done = 0
+    start = time.perf_counter()
+    for (A, B, C), color in zip(triangles, colors):
+        draw(pixels, size, A, B, C, color)
+        done += 1
+        if time.perf_counter() - start > budget:
+            break
+    elapsed = time.perf_counter() - start
+    if done == len(triangles):
+        return elapsed, np.asarray(image), False
+    return elapsed * len(triangles) / done, None, True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1024, help='square image size in pixels')
+    parser.add_argument('--counts', default=','.join(map(str, DEFAULT_COUNTS)),
+                        help='comma-separated triangle counts')
+    parser.add_argument('--budget', type=float, default=5.0,
+                        help='seconds each Lab_1 version may run per count before extrapolating')
+    parser.add_argument('--seed', type=int, default=607)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'triangles':>9} {'fullscreen':>12} {'bbox':>12} {'batched':>10} {'vs bbox':>9}  check")
+    for count in (int(c) for c in args.counts.split(',')):
+        triangles, colors = random_triangles(count, args.size, rng)
+        tuples, color_tuples = as_tuples(triangles, colors)
+
+        start = time.perf_counter()
+        batched = run_batched(triangles, colors, args.size)
+        batched_time = time.perf_counter() - start
+
+        row = []
+        checks = []
+        for name, draw in (('fullscreen', draw_fullscreen), ('bbox', draw_bbox)):
+            elapsed, image, estimated = time_reference(draw, tuples, color_tuples, args.size, args.budget)
+            row.append(f"{'~' if estimated else ''}{elapsed:.3f} s")
+            if name == 'bbox':
+                bbox_time = elapsed
+            if image is not None:
+                mismatched = int(np.any(image != batched, axis=2).sum())
+                checks.append(f"{name} {'identical' if mismatched == 0 else f'{mismatched} pixels differ'}")
+        print(f"{len(triangles):>9} {row[0]:>12} {row[1]:>12} {batched_time:>8.3f} s "
+              f"{bbox_time / batched_time:>8.0f}x  {', '.join(checks) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
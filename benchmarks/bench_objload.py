@@ -0,0 +1,60 @@
+"""
+Benchmark: pywavefront vs the streaming NumPy OBJ reader.
+
+Parses the same file with both and checks that they produce the same
+vertices and the same triangulated faces.
+
+Usage: python benchmarks/bench_objload.py [--obj man.obj] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pywavefront
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from rasterizer.objloader import load_obj  # noqa: E402
+
+
+def load_pywavefront(path):
+    pywavefront.logger.setLevel('ERROR')
+    scene = pywavefront.Wavefront(path, collect_faces=True, create_materials=True, parse=True, strict=False)
+    vertices = np.array(scene.vertices, dtype=np.float64)[:, :3]
+    faces = np.array([face for mesh in scene.mesh_list for face in mesh.faces], dtype=np.int32)
+    return vertices, faces
+
+def load_native(path):
+    obj = load_obj(path)
+    return obj.vertices, obj.faces
+
+def best_of(fn, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--obj', default=os.path.join(ROOT, 'man.obj'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    (ref_vertices, ref_faces), ref_time = best_of(load_pywavefront, args.obj, args.repeat)
+    (vertices, faces), native_time = best_of(load_native, args.obj, args.repeat)
+
+    print(f"{len(vertices)} vertices, {len(faces)} triangles")
+    print(f"pywavefront {ref_time:9.3f} s")
+    print(f"native      {native_time:9.3f} s  ({ref_time / native_time:.1f}x faster)")
+    same = np.array_equal(ref_vertices, vertices) and np.array_equal(ref_faces, faces)
+    print("identical output" if same else "OUTPUT DIFFERS")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Benchmark: per-pixel Python draw_phong vs the NumPy rasterizer.
+
+Renders the Lab_3 shading scene (man.obj rotated by ANGLE_DEG) several ways
+and checks that the Phong images are identical:
+
+    reference  - the original pure-Python draw_phong loop
+    batched    - rasterizer.raster.draw_phong_batch, all triangles at once
+    deferred   - rasterizer.deferred.draw_phong_deferred, G-buffer then one
+                 lighting pass per covered pixel
+    tiled      - rasterizer.tiles.draw_phong_tiled, 64x64 screen tiles shaded
+                 by a thread pool
+    gouraud    - rasterizer.raster.draw_batch(shading='gouraud'), every shared
+                 vertex lit once (rasterizer.shading.tier_colors)
+    flat       - rasterizer.raster.draw_batch(shading='flat'), lit per face,
+                 one color per triangle
+
+The gouraud and flat preview tiers are expected to differ from the rest;
+they are listed to show what per-pixel lighting costs.
+
+Usage: python benchmarks/bench_raster.py [--size 1024] [--skip-reference] [--workers N]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pywavefront
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from rasterizer.deferred import draw_phong_deferred  # noqa: E402
+from rasterizer.raster import draw_batch, draw_phong_batch, new_buffers  # noqa: E402
+from rasterizer.shading import tier_colors  # noqa: E402
+from rasterizer.tiles import draw_phong_tiled  # noqa: E402
+
+ANGLE_DEG = 200
+
+
+class Light:
+    def __init__(self, position, intensity=(1, 1, 1)):
+        self.position = position
+        self.intensity = intensity
+
+class Material:
+    def __init__(self, diffuse, specular, shininess):
+        self.diffuse = diffuse
+        self.specular = specular
+        self.shininess = shininess
+
+light = Light(position=(2, 2, 0), intensity=(1, 1, 1))
+material = Material(diffuse=(0.8, 0.1, 0.1), specular=(1.0, 1.0, 1.0), shininess=32)
+
+
+# === REFERENCE (copied from Lab_3/Shading/Version2_rotation.py) ===
+def subtract(a, b): return tuple(a[i] - b[i] for i in range(3))
+def dot(a, b): return sum(a[i] * b[i] for i in range(3))
+def normalize_vector(v):
+    length = math.sqrt(dot(v, v))
+    return tuple(c / length for c in v) if length != 0 else (0, 0, 0)
+def reflect(L, N):
+    dotLN = dot(L, N)
+    return tuple(2 * dotLN * N[i] - L[i] for i in range(3))
+
+def compute_phong_color(pos, normal, material, light):
+    N = normalize_vector(normal)
+    L = normalize_vector(subtract(light.position, pos))
+    V = normalize_vector(tuple(-c for c in pos))
+    if dot(N, L) < 0:
+        N = tuple(-n for n in N)
+    R = reflect(L, N)
+    ambient = (0.1, 0.1, 0.1)
+    dot_nl = max(dot(N, L), 0)
+    diffuse = tuple(material.diffuse[i] * light.intensity[i] * dot_nl for i in range(3))
+    dot_rv = max(dot(R, V), 0)
+    specular = tuple(material.specular[i] * light.intensity[i] * (dot_rv ** material.shininess) for i in range(3))
+    color = tuple(min(1, ambient[i] + diffuse[i] + specular[i]) for i in range(3))
+    return tuple(int(c * 255) for c in color)
+
+def edge_func(a, b, c):
+    return (c[0] - a[0]) * (b[1] - a[1]) - (c[1] - a[1]) * (b[0] - a[0])
+
+def reference_draw_phong(p1, p2, p3, v1, v2, v3, n1, n2, n3, pixels, z_buffer, width, height):
+    min_x = max(min(p1[0], p2[0], p3[0]), 0)
+    max_x = min(max(p1[0], p2[0], p3[0]), width - 1)
+    min_y = max(min(p1[1], p2[1], p3[1]), 0)
+    max_y = min(max(p1[1], p2[1], p3[1]), height - 1)
+    area = edge_func(p1, p2, p3)
+    if area == 0: return
+
+    for y in range(min_y, max_y + 1):
+        for x in range(min_x, max_x + 1):
+            p = (x, y)
+            w0 = edge_func(p2, p3, p)
+            w1 = edge_func(p3, p1, p)
+            w2 = edge_func(p1, p2, p)
+            if (w0 >= 0 and w1 >= 0 and w2 >= 0) or (w0 <= 0 and w1 <= 0 and w2 <= 0):
+                alpha = w0 / area
+                beta = w1 / area
+                gamma = w2 / area
+                pos = tuple(alpha * v1[i] + beta * v2[i] + gamma * v3[i] for i in range(3))
+                z = pos[2]
+                if z < z_buffer[y][x]:
+                    z_buffer[y][x] = z
+                    norm = tuple(alpha * n1[i] + beta * n2[i] + gamma * n3[i] for i in range(3))
+                    pixels[y][x] = compute_phong_color(pos, norm, material, light)
+
+
+# === SCENE SETUP (same as Lab_3/Shading/Version2_rotation.py) ===
+def load_scene(path, width, height):
+    pywavefront.logger.setLevel('ERROR')
+    scene = pywavefront.Wavefront(path, collect_faces=True, create_materials=True, parse=True, strict=False)
+
+    all_vertices = [tuple(v[:3]) for v in scene.vertices]
+    mins = [min(v[i] for v in all_vertices) for i in range(3)]
+    maxs = [max(v[i] for v in all_vertices) for i in range(3)]
+    center = tuple((mins[i] + maxs[i]) / 2 for i in range(3))
+    scale = 2.5 / max(maxs[i] - mins[i] for i in range(3))
+    cos_a = math.cos(math.radians(ANGLE_DEG))
+    sin_a = math.sin(math.radians(ANGLE_DEG))
+
+    def normalize_vertex(v):
+        x, y, z = ((v[i] - center[i]) * scale for i in range(3))
+        x, z = cos_a * x + sin_a * z, -sin_a * x + cos_a * z
+        return (x, y, z + 2.5)
+
+    def project_vertex(v):
+        x, y, z = v
+        if z == 0: z = 1e-5
+        return (int((x / z + 1) * width / 2), int((1 - y / z) * height / 2))
+
+    verts = [normalize_vertex(v) for v in scene.vertices]
+    faces = [face for mesh in scene.mesh_list for face in mesh.faces if len(face) == 3]
+
+    vertex_normals = defaultdict(lambda: [0, 0, 0])
+    for face in faces:
+        v0, v1, v2 = (verts[i] for i in face)
+        edge1 = subtract(v1, v0)
+        edge2 = subtract(v2, v0)
+        face_normal = (
+            edge1[1]*edge2[2] - edge1[2]*edge2[1],
+            edge1[2]*edge2[0] - edge1[0]*edge2[2],
+            edge1[0]*edge2[1] - edge1[1]*edge2[0]
+        )
+        for idx in face:
+            for i in range(3):
+                vertex_normals[idx][i] += face_normal[i]
+    normals = {idx: normalize_vector(n) for idx, n in vertex_normals.items()}
+
+    triangles = []
+    for face in faces:
+        v = [verts[i] for i in face]
+        triangles.append(([project_vertex(p) for p in v], v, [normals[i] for i in face]))
+    return triangles, np.array(faces, dtype=np.int64)
+
+
+# === RUNNERS ===
+def run_reference(triangles, width, height):
+    pixels = [[(0, 0, 0)] * width for _ in range(height)]
+    z_buffer = [[float('inf')] * width for _ in range(height)]
+    for p, v, n in triangles:
+        reference_draw_phong(*p, *v, *n, pixels, z_buffer, width, height)
+    return np.array(pixels, dtype=np.uint8)
+
+def run_batched(triangles, width, height, draw=draw_phong_batch):
+    color_buffer, z_buffer = new_buffers(width, height)
+    screen = np.array([t[0] for t in triangles])
+    verts = np.array([t[1] for t in triangles])
+    normals = np.array([t[2] for t in triangles])
+    draw(screen, verts, normals, color_buffer, z_buffer, material, light)
+    return color_buffer
+
+def run_deferred(triangles, width, height):
+    return run_batched(triangles, width, height, draw=draw_phong_deferred)
+
+def run_tiled(triangles, width, height, workers=None):
+    def draw(*args):
+        draw_phong_tiled(*args, workers=workers)
+    return run_batched(triangles, width, height, draw=draw)
+
+def run_shading(triangles, faces, width, height, shading):
+    def draw(screen, verts, normals, *args):
+        # Scatter the corners back into vertex arrays so the colors come from the index buffer
+        vertices = np.zeros((faces.max() + 1, 3))
+        vertex_normals = np.zeros((faces.max() + 1, 3))
+        vertices[faces] = verts
+        vertex_normals[faces] = normals
+        colors = tier_colors(vertices, vertex_normals, faces, material, light, shading)
+        draw_batch(screen, verts, normals, *args, shading=shading, colors=colors)
+    return run_batched(triangles, width, height, draw=draw)
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<11} {elapsed:9.3f} s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1024, help='square image size in pixels')
+    parser.add_argument('--obj', default=os.path.join(ROOT, 'man.obj'))
+    parser.add_argument('--skip-reference', action='store_true', help='only time the NumPy paths')
+    parser.add_argument('--workers', type=int, default=None, help='threads for the tiled path (default: all cores)')
+    args = parser.parse_args()
+
+    triangles, faces = load_scene(args.obj, args.size, args.size)
+    print(f"{len(triangles)} triangles at {args.size}x{args.size}")
+
+    results = {}
+    if not args.skip_reference:
+        results['reference'] = timed('reference', run_reference, triangles, args.size, args.size)
+    results['batched'] = timed('batched', run_batched, triangles, args.size, args.size)
+    results['deferred'] = timed('deferred', run_deferred, triangles, args.size, args.size)
+    results['tiled'] = timed('tiled', run_tiled, triangles, args.size, args.size, args.workers)
+    results['gouraud'] = timed('gouraud', run_shading, triangles, faces, args.size, args.size, 'gouraud')
+    results['flat'] = timed('flat', run_shading, triangles, faces, args.size, args.size, 'flat')
+
+    baseline_name = 'reference' if 'reference' in results else 'batched'
+    baseline, baseline_time = results[baseline_name]
+    for name, (image, elapsed) in results.items():
+        if name == baseline_name:
+            continue
+        mismatched = int(np.any(image != baseline, axis=2).sum())
+        status = "identical" if mismatched == 0 else f"{mismatched} pixels differ"
+        print(f"{name:<11} {baseline_time / elapsed:7.1f}x faster than {baseline_name}, {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+"""
+Benchmark suite: per-stage timings for every renderer version.
+
+Cases (each timed at every --sizes resolution):
+
+    lab1_fullscreen  - Lab_1/Version1.py, edge test on every pixel of the image
+    lab1_bbox        - Lab_1/Version2.py, edge test inside the bounding box only
+    lab2_painter     - Lab_2/Version1.py, projected triangles drawn back to front
+    lab3_shading     - Lab_3/Shading/Version2_rotation.py: one Renderer.render per --meshes entry
+    lab3_animation   - Lab_3/Animation pipeline: --frames turntable frames encoded to video
+
+The Lab_1 and Lab_2 loops are copied here unchanged because the scripts run on
+import; the Lab_3 cases draw through rasterizer.renderer.Renderer like the
+scripts do, with level of detail on, once per --variants entry:
+
+    phong    - the default forward Phong path
+    gouraud  - shading='gouraud'
+    flat     - shading='flat'
+    hiz      - Phong with occlusion_culling=True (rasterizer/hiz.py)
+
+Every case reports the seconds spent per stage:
+
+    load, normalize, normals, transform, cull, raster, shade, encode
+
+For the Lab_3 cases the stages come from the Renderer's trace events: raster
+includes per-pixel Phong lighting, shade is the per-vertex / per-face
+lighting of the gouraud and flat tiers, and load of an OBJ includes the mesh
+cache and LOD chain. Meshes are OBJ paths or synthetic triangle soups written
+soup:COUNT. Each case runs --repeat times and keeps the fastest time per stage.
+
+--output writes the results as JSON. --baseline compares against an earlier
+JSON file and exits with status 1 when a stage got slower than --tolerance,
+ignoring stages faster than --min-time on both sides as timer noise.
+--save-baseline records the current run as the new baseline. Timings depend
+on the machine, so the baseline is not part of the repository: record it
+with --save-baseline on the machine that runs the comparison, and again
+after an intended change.
+
+Usage: python benchmarks/bench_stages.py [--sizes 256 512 1024] [--meshes man.obj soup:20000]
+                                         [--baseline benchmarks/baseline.json]
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from rasterizer.instrument import Instrumentation  # noqa: E402
+from rasterizer.normals import vertex_normals  # noqa: E402
+from rasterizer.renderer import Renderer  # noqa: E402
+from rasterizer.scene import Camera, Light, Material, Mesh, MeshLevel  # noqa: E402
+from rasterizer.transform import build_transformation_matrix, to_homogeneous  # noqa: E402
+
+STAGES = ('load', 'normalize', 'normals', 'transform', 'cull', 'raster', 'shade', 'encode')
+CASES = ('lab1_fullscreen', 'lab1_bbox', 'lab2_painter', 'lab3_shading', 'lab3_animation')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Renderer options per Lab_3 variant; level of detail is on in all of them
+VARIANTS = OrderedDict([
+    ('phong', {}),
+    ('gouraud', {'shading': 'gouraud'}),
+    ('flat', {'shading': 'flat'}),
+    ('hiz', {'occlusion_culling': True}),
+])
+# Renderer trace stages and the suite stage each one counts towards
+RENDER_STAGES = {'transform': 'transform', 'cull': 'cull', 'vertex shading': 'shade', 'raster': 'raster'}
+
+light = Light(position=(2, 2, 0))
+material = Material(diffuse=(0.8, 0.1, 0.1), specular=(1.0, 1.0, 1.0), shininess=32)
+
+
+# === STAGE TIMER ===
+class StageTimer:
+    """ Accumulates wall time per stage name: with timer.stage('raster'): ... """
+    def __init__(self):
+        self.seconds = OrderedDict()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+class _Stage:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.timer.seconds[self.name] = self.timer.seconds.get(self.name, 0.0) + elapsed
+
+def encode_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getbuffer().nbytes
+
+
+# === LAB 1 ===
+def line_equation(v1, v2, x, y):
+    return (v2[0] - v1[0]) * (y - v1[1]) - (v2[1] - v1[1]) * (x - v1[0])
+
+# Triangle of each Lab_1 script in its 1024x1024 coordinates
+LAB1_TRIANGLES = {
+    'fullscreen': ((300, 100), (100, 500), (500, 500)),
+    'bbox': ((300, 100), (100, 400), (400, 500)),
+}
+
+def lab1_triangle(size, bbox):
+    """ The Lab_1 triangle, scaled to size """
+    s = size / 1024
+    return [(int(x * s), int(y * s)) for x, y in LAB1_TRIANGLES['bbox' if bbox else 'fullscreen']]
+
+def run_lab1(timer, size, bbox):
+    width = height = size
+    A, B, C = lab1_triangle(size, bbox)
+    with timer.stage('raster'):
+        image = Image.new("RGB", (width, height), "black")
+        pixels = image.load()
+        if bbox:
+            xs = range(min(A[0], B[0], C[0]), max(A[0], B[0], C[0]) + 1)
+            ys = range(min(A[1], B[1], C[1]), max(A[1], B[1], C[1]) + 1)
+        else:
+            xs, ys = range(width), range(height)
+        for y in ys:
+            for x in xs:
+                w1 = line_equation(A, B, x, y)
+                w2 = line_equation(B, C, x, y)
+                w3 = line_equation(C, A, x, y)
+                if (w1 >= 0 and w2 >= 0 and w3 >= 0) or (w1 <= 0 and w2 <= 0 and w3 <= 0):
+                    pixels[x, y] = (255, 0, 0)
+    with timer.stage('encode'):
+        encode_png(image)
+
+
+# === LAB 2 ===
+LAB2_TRIANGLES = [
+    [(1.3, -0.5, 5), (1.5, 1.2, 5), (1.0, 0.5, 5), (0, 255, 0)],
+    [(-0.5, -0.5, 2), (0.5, 0, 2), (0.0, 0.5, 2), (255, 0, 0)],
+    [(-0.5, -1.5, 2), (0.5, -1.5, 2), (0.5, 0.5, 2), (0, 0, 255)],
+    [(1.5, -1.5, 3), (0.5, -1.5, 4), (0.5, 0.5, 3), (50, 10, 100)],
+]
+
+def run_lab2(timer, size):
+    width = height = size
+    with timer.stage('transform'):
+        projected_triangles = []
+        for tri in LAB2_TRIANGLES:
+            projected = []
+            for x, y, z in tri[:3]:
+                z = z or 1e-5
+                projected.append((x / z, y / z, 1 / z))
+            screen = [(int((x + 1) * width / 2), int((1 - y) * height / 2)) for x, y, _ in projected]
+            projected_triangles.append((sum(p[2] for p in projected) / 3, screen, tri[3]))
+        projected_triangles.sort(key=lambda t: t[0])
+
+    with timer.stage('raster'):
+        image = Image.new("RGB", (width, height), (0, 0, 0))
+        pixels = image.load()
+        for _, (A, B, C), color in projected_triangles:
+            for y in range(max(min(A[1], B[1], C[1]), 0), min(max(A[1], B[1], C[1]), height - 1) + 1):
+                for x in range(max(min(A[0], B[0], C[0]), 0), min(max(A[0], B[0], C[0]), width - 1) + 1):
+                    w1 = line_equation(A, B, x, y)
+                    w2 = line_equation(B, C, x, y)
+                    w3 = line_equation(C, A, x, y)
+                    if (w1 >= 0 and w2 >= 0 and w3 >= 0) or (w1 <= 0 and w2 <= 0 and w3 <= 0):
+                        pixels[x, y] = color
+    with timer.stage('encode'):
+        encode_png(image)
+
+
+# === LAB 3 ===
+def triangle_soup(count, seed=0):
+    """
+    count independent triangles (no shared vertices) scattered through a unit
+    cube, each about 1/50 of the cube across, as (vertices, faces).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-1, 1, (count, 1, 3))
+    vertices = (centers + rng.normal(scale=0.02, size=(count, 3, 3))).reshape(-1, 3)
+    faces = np.arange(3 * count, dtype=np.int32).reshape(-1, 3)
+    return vertices, faces
+
+def load_scene_mesh(timer, mesh):
+    """ Mesh.load for an OBJ path (mesh cache and LOD chain), a single-level Mesh for soup:COUNT """
+    if not mesh.startswith('soup:'):
+        with timer.stage('load'):
+            return Mesh.load(mesh)
+    with timer.stage('load'):
+        vertices, faces = triangle_soup(int(mesh[5:]))
+    with timer.stage('normalize'):
+        # Centered, scaled to a 2.5 unit box: the normalization of Mesh.load
+        bounds_min, bounds_max = vertices.min(axis=0), vertices.max(axis=0)
+        vertices = vertices - (bounds_min + bounds_max) / 2
+        scale = 2.5 / np.max(bounds_max - bounds_min)
+        radius = float(np.linalg.norm(bounds_max - bounds_min) / 2) * scale
+    with timer.stage('normals'):
+        normals = vertex_normals(vertices, faces)
+    level = MeshLevel(to_homogeneous(vertices), faces, normals)
+    return Mesh([level], build_transformation_matrix(0, scale, (0, 0, 0)), radius)
+
+def render_view(timer, renderer, camera):
+    """ renderer.render(camera) with its trace stages added to timer; returns the image """
+    instrument = Instrumentation(camera.width, camera.height, overdraw=False)
+    image = renderer.render(camera, light, instrument=instrument, copy=False)
+    for event in instrument.events:
+        name = RENDER_STAGES.get(event['name'])
+        if name is not None:
+            timer.seconds[name] = timer.seconds.get(name, 0.0) + event['dur'] / 1e6
+    return image
+
+def run_lab3_shading(timer, size, mesh, variant):
+    renderer = Renderer(load_scene_mesh(timer, mesh), material, **VARIANTS[variant])
+    image = render_view(timer, renderer, Camera.turntable(size, size, 200))
+    with timer.stage('encode'):
+        encode_png(Image.fromarray(image))
+
+def run_lab3_animation(timer, size, mesh, variant, frames):
+    renderer = Renderer(load_scene_mesh(timer, mesh), material, **VARIANTS[variant])
+    try:
+        import imageio.v2 as imageio
+    except ImportError:
+        imageio = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = imageio.get_writer(os.path.join(tmp, 'bench.mp4'), fps=20) if imageio else None
+        for frame in range(frames):
+            image = render_view(timer, renderer, Camera.turntable(size, size, frame / frames * 360))
+            with timer.stage('encode'):
+                if writer is not None:
+                    writer.append_data(image)
+                else:
+                    encode_png(Image.fromarray(image))
+        if writer is not None:
+            with timer.stage('encode'):
+                writer.close()
+
+
+# === SUITE ===
+def suite(cases, sizes, meshes, variants, frames):
+    """ Yields (case, mesh, variant, size, run) with run(timer) executing one repetition """
+    for size in sizes:
+        if 'lab1_fullscreen' in cases:
+            yield 'lab1_fullscreen', None, None, size, lambda t, s=size: run_lab1(t, s, bbox=False)
+        if 'lab1_bbox' in cases:
+            yield 'lab1_bbox', None, None, size, lambda t, s=size: run_lab1(t, s, bbox=True)
+        if 'lab2_painter' in cases:
+            yield 'lab2_painter', None, None, size, lambda t, s=size: run_lab2(t, s)
+        for mesh in meshes:
+            for variant in variants:
+                if 'lab3_shading' in cases:
+                    yield ('lab3_shading', mesh, variant, size,
+                           lambda t, s=size, m=mesh, v=variant: run_lab3_shading(t, s, m, v))
+                if 'lab3_animation' in cases:
+                    yield ('lab3_animation', mesh, variant, size,
+                           lambda t, s=size, m=mesh, v=variant: run_lab3_animation(t, s, m, v, frames))
+
+def result_key(result):
+    return f"{result['case']}/{result['mesh'] or '-'}/{result['variant'] or '-'}/{result['size']}"
+
+def run_suite(cases, sizes, meshes, variants, frames, repeat):
+    results = []
+    for case, mesh, variant, size, run in suite(cases, sizes, meshes, variants, frames):
+        best = {}
+        for _ in range(repeat):
+            timer = StageTimer()
+            run(timer)
+            for stage, seconds in timer.seconds.items():
+                best[stage] = min(seconds, best.get(stage, math.inf))
+        stages = {stage: round(best[stage], 6) for stage in STAGES if stage in best}
+        result = {'case': case, 'mesh': mesh and os.path.basename(mesh), 'variant': variant, 'size': size,
+                  'stages': stages, 'total': round(sum(stages.values()), 6)}
+        print(f"{result_key(result):<48} {result['total']:8.3f} s  " +
+              "  ".join(f"{stage} {seconds:.3f}" for stage, seconds in stages.items()), flush=True)
+        results.append(result)
+    return results
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+# === BASELINE ===
+def compare(results, baseline, tolerance, min_time):
+    """ Prints every stage that differs by more than tolerance; returns the list of regressions """
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        for stage, seconds in result['stages'].items():
+            before = old['stages'].get(stage)
+            if before is None or max(before, seconds) < min_time:
+                continue
+            ratio = seconds / before if before > 0 else math.inf
+            if ratio > 1 + tolerance:
+                regressions.append((result_key(result), stage, before, seconds))
+                print(f"REGRESSION {result_key(result)} {stage}: {before:.3f} s -> {seconds:.3f} s ({ratio:.2f}x)")
+            elif ratio < 1 / (1 + tolerance):
+                print(f"improved   {result_key(result)} {stage}: {before:.3f} s -> {seconds:.3f} s ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[256, 512, 1024])
+    parser.add_argument('--meshes', nargs='+', default=[os.path.join(ROOT, 'man.obj'), 'soup:20000'])
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS),
+                        help='Renderer configurations of the Lab_3 cases')
+    parser.add_argument('--frames', type=int, default=4, help='frames per lab3_animation run')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the fastest time per stage is kept')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help=f'compare against this JSON file (default: {os.path.relpath(DEFAULT_BASELINE)})')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown per stage (0.5 = 50%%)')
+    parser.add_argument('--min-time', type=float, default=0.02, help='stages faster than this are not compared')
+    args = parser.parse_args()
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}, record one on this machine with --save-baseline first")
+
+    results = run_suite(args.cases, args.sizes, args.meshes, args.variants, args.frames, args.repeat)
+    report = {'environment': environment(), 'results': results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_time)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
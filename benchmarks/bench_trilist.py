@@ -0,0 +1,136 @@
+"""
+Benchmark: Lab_2 painter's sort vs rasterizer.trilist.draw_triangle_list.
+
+Draws random flat-colored triangles scattered through the view frustum
+(z from 2 to 10) two ways:
+
+    painter  - Lab_2/Version1.py, per-vertex projection, sort by average
+               1/z, then line_equation inside each bounding box back to front
+    zbuffer  - draw_triangle_list, projection, culling and a z-buffered
+               raster of all triangles in NumPy
+
+for triangle counts from 1e2 to 1e6. The painter projects and sorts every
+triangle, but only draws for --budget seconds; its drawing time is
+extrapolated to the full count and those rows are marked with ~. Where
+the painter finished, the pixels that differ are counted: the painter gets
+intersecting and cyclically overlapping triangles wrong.
+
+Usage: python benchmarks/bench_trilist.py [--size 1024] [--counts 100,1000,10000,100000,1000000] [--budget 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from rasterizer.raster import new_buffers  # noqa: E402
+from rasterizer.trilist import draw_triangle_list  # noqa: E402
+
+DEFAULT_COUNTS = (100, 1000, 10000, 100000, 1000000)
+
+
+# === REFERENCE (copied from Lab_2/Version1.py) ===
+def perspective_project(vertex):
+    x, y, z = vertex
+    if z == 0:
+        z = 1e-5  # Avoid divide-by-zero
+    return (x / z, y / z, 1 / z)
+
+def line_equation(v1, v2, x, y):
+    return (v2[0] - v1[0]) * (y - v1[1]) - (v2[1] - v1[1]) * (x - v1[0])
+
+def draw_triangle(pixels, width, height, screen_coords, color):
+    A, B, C = screen_coords
+    min_x = max(min(A[0], B[0], C[0]), 0)
+    max_x = min(max(A[0], B[0], C[0]), width - 1)
+    min_y = max(min(A[1], B[1], C[1]), 0)
+    max_y = min(max(A[1], B[1], C[1]), height - 1)
+    for y in range(min_y, max_y + 1):
+        for x in range(min_x, max_x + 1):
+            w1 = line_equation(A, B, x, y)
+            w2 = line_equation(B, C, x, y)
+            w3 = line_equation(C, A, x, y)
+            if (w1 >= 0 and w2 >= 0 and w3 >= 0) or (w1 <= 0 and w2 <= 0 and w3 <= 0):
+                pixels[x, y] = color
+
+def time_painter(triangles, size, budget):
+    """
+    (seconds for all triangles, image, estimated); image is None and the
+    drawing time extrapolated when the budget ran out first.
+    """
+    start = time.perf_counter()
+    projected_triangles = []
+    for tri in triangles:
+        projected = [perspective_project(v) for v in tri[:3]]
+        screen_coords = [(int((x + 1) * size / 2), int((1 - y) * size / 2)) for x, y, _ in projected]
+        projected_triangles.append((sum(p[2] for p in projected) / 3, screen_coords, tri[3]))
+    projected_triangles.sort(key=lambda t: t[0])
+    setup = time.perf_counter() - start
+
+    image = Image.new("RGB", (size, size), (0, 0, 0))
+    pixels = image.load()
+    done = 0
+    start = time.perf_counter()
+    for _, screen_coords, color in projected_triangles:
+        draw_triangle(pixels, size, size, screen_coords, color)
+        done += 1
+        if time.perf_counter() - start > budget:
+            break
+    elapsed = time.perf_counter() - start
+    if done == len(projected_triangles):
+        return setup + elapsed, np.asarray(image), False
+    return setup + elapsed * len(projected_triangles) / done, None, True
+
+
+# === SCENE ===
+def random_scene(count, rng):
+    """
+    count triangles as a Lab_2 list. Their size shrinks with the count, so
+    the total projected area stays around a few times the image.
+    """
+    z = rng.uniform(2, 10, size=(count, 1, 1))
+    centers = np.concatenate([rng.uniform(-1, 1, size=(count, 1, 2)) * z, z], axis=2)
+    extent = min(0.5, 2 / np.sqrt(count))
+    verts = centers + rng.normal(scale=extent, size=(count, 3, 3)) * z
+    colors = rng.integers(1, 256, size=(count, 3))
+    return [(tuple(map(tuple, v)), tuple(c)) for v, c in zip(verts.tolist(), colors.tolist())]
+
+def as_lab2(scene):
+    return [[*verts, color] for verts, color in scene]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1024, help='square image size in pixels')
+    parser.add_argument('--counts', default=','.join(map(str, DEFAULT_COUNTS)),
+                        help='comma-separated triangle counts')
+    parser.add_argument('--budget', type=float, default=5.0,
+                        help='seconds the painter may draw per count before extrapolating')
+    parser.add_argument('--seed', type=int, default=607)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'triangles':>9} {'painter':>12} {'zbuffer':>10} {'speedup':>9}  check")
+    for count in (int(c) for c in args.counts.split(',')):
+        triangles = as_lab2(random_scene(count, rng))
+
+        start = time.perf_counter()
+        color_buffer, z_buffer = new_buffers(args.size, args.size)
+        draw_triangle_list(triangles, color_buffer, z_buffer)
+        zbuffer_time = time.perf_counter() - start
+
+        painter_time, image, estimated = time_painter(triangles, args.size, args.budget)
+        check = '-'
+        if image is not None:
+            check = f"{int(np.any(image != color_buffer, axis=2).sum())} pixels differ from the painter"
+        print(f"{count:>9} {'~' if estimated else ''}{painter_time:>11.3f} s {zbuffer_time:>8.3f} s "
+              f"{painter_time / zbuffer_time:>8.0f}x  {check}")
+
+
+if __name__ == '__main__':
+    main()
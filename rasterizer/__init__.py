@@ -0,0 +1,11 @@
+"""
+Shared NumPy building blocks for the EPL607 software rasterizer.
+
+The Lab scripts import from here so that the heavy per-pixel work runs as
+array operations instead of Python loops.
+
+Renderer, Mesh, Camera, Light and Material form the reusable API on top:
+load a Mesh once, then call Renderer.render(camera, lights) for every view.
+"""
+from .renderer import Renderer
+from .scene import Camera, Light, Material, Mesh
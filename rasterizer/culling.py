@@ -0,0 +1,83 @@
+import numpy as np
+
+
+# === CULL STATISTICS ===
+class CullStats:
+    """ How many triangles each culling test removed from one frame """
+    def __init__(self, submitted=0, behind=0, offscreen=0, degenerate=0, backfacing=0, occluded=0):
+        self.submitted = submitted
+        self.behind = behind
+        self.offscreen = offscreen
+        self.degenerate = degenerate
+        self.backfacing = backfacing
+        self.occluded = occluded  # filled in by the hierarchical Z pass, see hiz.py
+
+    @property
+    def culled(self):
+        return self.behind + self.offscreen + self.degenerate + self.backfacing + self.occluded
+
+    @property
+    def visible(self):
+        return self.submitted - self.culled
+
+    def __str__(self):
+        return (f"{self.visible}/{self.submitted} triangles kept "
+                f"(back-facing {self.backfacing}, degenerate {self.degenerate}, "
+                f"off-screen {self.offscreen}, behind camera {self.behind}, occluded {self.occluded})")
+
+
+# === CULLING STAGE ===
+def cull_triangles(screen, verts, width, height, backface=True, subpixel_bits=None):
+    """
+    Finds the triangles that can possibly cover a pixel.
+
+    screen is (T, 3, 2) projected pixel coordinates and verts (T, 3, 3)
+    view-space positions, as passed to draw_phong_batch. The tests run in
+    this order, each one only counting triangles the earlier ones kept:
+
+        behind      - any vertex at z <= 0, i.e. on or behind the camera plane
+        offscreen   - bounding box entirely outside the image
+        degenerate  - zero edge_func area in pixel space, the per-pixel draw_phong loop would skip it
+        backfacing  - outward normal (counter-clockwise winding) points away
+                      from the camera at the origin; skipped with backface=False
+
+    There is no near-plane clipping: a vertex at z <= 0 has no valid
+    perspective projection, so a triangle that crosses the camera plane is
+    dropped whole rather than drawn from flipped screen coordinates. Keep the
+    camera far enough back that the mesh stays in front of it.
+
+    With subpixel_bits=n, screen holds fixed-point coordinates as produced
+    by project_vertices(..., subpixel_bits=n).
+
+    Returns (keep, stats): a boolean (T,) mask that preserves submission
+    order, and a CullStats for the frame.
+    """
+    screen = np.asarray(screen)
+    verts = np.asarray(verts)
+    stats = CullStats(submitted=len(screen))
+
+    keep = np.all(verts[:, :, 2] > 0, axis=1)
+    stats.behind = int(len(keep) - keep.sum())
+
+    min_xy = screen.min(axis=1)
+    max_xy = screen.max(axis=1)
+    if subpixel_bits is not None:
+        min_xy = min_xy >> subpixel_bits
+        max_xy = max_xy >> subpixel_bits
+    onscreen = (max_xy[:, 0] >= 0) & (max_xy[:, 1] >= 0) & (min_xy[:, 0] <= width - 1) & (min_xy[:, 1] <= height - 1)
+    stats.offscreen = int((keep & ~onscreen).sum())
+    keep &= onscreen
+
+    p1, p2, p3 = screen[:, 0], screen[:, 1], screen[:, 2]
+    area = (p3[:, 0] - p1[:, 0]) * (p2[:, 1] - p1[:, 1]) - (p3[:, 1] - p1[:, 1]) * (p2[:, 0] - p1[:, 0])
+    stats.degenerate = int((keep & (area == 0)).sum())
+    keep &= area != 0
+
+    if backface:
+        v0 = verts[:, 0]
+        normal = np.cross(verts[:, 1] - v0, verts[:, 2] - v0)
+        front = np.einsum('ij,ij->i', normal, v0) < 0
+        stats.backfacing = int((keep & ~front).sum())
+        keep &= front
+
+    return keep, stats
@@ -0,0 +1,81 @@
+import numpy as np
+
+from .instrument import stage
+from .raster import MAX_BATCH_FRAGMENTS, rasterize_batch
+from .shading import phong_colors
+
+
+# === G-BUFFER ===
+class GBuffer:
+    """ Per-pixel view-space position, interpolated normal and depth of the nearest fragment """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.position = np.zeros((height, width, 3))
+        self.normal = np.zeros((height, width, 3))
+        self.depth = np.full((height, width), np.inf)
+
+    def clear(self):
+        self.position.fill(0)
+        self.normal.fill(0)
+        self.depth.fill(np.inf)
+
+    def covered(self):
+        """ Boolean (H, W) mask of pixels that received a fragment """
+        return np.isfinite(self.depth)
+
+
+# === GEOMETRY PASS ===
+def rasterize_gbuffer(screen, verts, normals, gbuffer, max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None,
+                      instrument=None):
+    """
+    Fills the G-buffer with the visible surface of T triangles.
+
+    Takes the same (T, 3, 2) / (T, 3, 3) arrays as draw_phong_batch. Only
+    position, normal and depth are written; no lighting is evaluated, so
+    overdrawn fragments cost a couple of array stores instead of a full
+    Phong evaluation.
+    """
+    for y, x, pos, norm in rasterize_batch(screen, verts, normals, gbuffer.depth, max_fragments, subpixel_bits,
+                                           instrument):
+        gbuffer.position[y, x] = pos
+        gbuffer.normal[y, x] = norm
+
+
+# === LIGHTING PASS ===
+def shade_gbuffer(gbuffer, material, light, color_buffer):
+    """ Runs Phong lighting once for every covered pixel and writes the result into color_buffer """
+    y, x = np.nonzero(gbuffer.covered())
+    if len(y) == 0:
+        return
+    color_buffer[y, x] = phong_colors(gbuffer.position[y, x], gbuffer.normal[y, x], material, light)
+
+
+def draw_phong_deferred(screen, verts, normals, color_buffer, z_buffer, material, light, gbuffer=None,
+                        max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None, instrument=None):
+    """
+    Deferred counterpart of draw_phong_batch with the same arguments and result.
+
+    The depth from z_buffer seeds the G-buffer and is written back afterwards,
+    so both paths can be mixed on the same frame. Pass a GBuffer to reuse its
+    arrays across frames.
+    """
+    height, width = z_buffer.shape
+    if gbuffer is None:
+        gbuffer = GBuffer(width, height)
+    else:
+        gbuffer.clear()
+    gbuffer.depth[:] = z_buffer
+
+    with stage(instrument, 'geometry pass'):
+        rasterize_gbuffer(screen, verts, normals, gbuffer, max_fragments, subpixel_bits, instrument)
+
+    # Only pixels covered in this pass get lit; earlier depth has no position to shade
+    with stage(instrument, 'lighting pass'):
+        written = gbuffer.depth < z_buffer
+        y, x = np.nonzero(written)
+        if len(y):
+            color_buffer[y, x] = phong_colors(gbuffer.position[y, x], gbuffer.normal[y, x], material, light)
+        z_buffer[:] = gbuffer.depth
+    if instrument is not None:
+        instrument.count(shading_calls=len(y))
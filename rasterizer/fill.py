@@ -0,0 +1,64 @@
+"""
+Batched 2D triangle fill.
+
+The Lab_1 rasterizer for many triangles per call, e.g. masks and overlays:
+no depth, no shading, every covered pixel takes its triangle's color and
+later triangles paint over earlier ones. Coverage uses the same stepped
+edge functions as rasterize_batch.
+"""
+import numpy as np
+
+from .raster import MAX_BATCH_FRAGMENTS, _batch_ranges, _cover_run, _setup_triangles
+
+
+# === 2D FILL ===
+def fill_triangles(image_array, triangles, colors, max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None):
+    """
+    Fills T triangles into image_array in place and returns it.
+
+    image_array is an (H, W, C) or (H, W) NumPy array, e.g. an RGB image or a
+    mask; anything else raises TypeError rather than filling a copy (use
+    np.array(pil_image) and Image.fromarray for PIL images);
+    triangles is (T, 3, 2) pixel coordinates (x, y); colors is one value per
+    triangle, (T, C) or (T,), or a single color for all of them.
+
+    With subpixel_bits=None, vertices are whole pixels and coverage matches
+    Lab_1: a pixel is filled when it lies inside or on the edges of the
+    triangle, for either winding. With subpixel_bits=n, vertices may be
+    fractional, pixels are sampled at their centers and shared edges follow
+    the top-left rule (see rasterize_batch), so a mesh of 2D triangles
+    fills every pixel exactly once. Zero-area triangles are skipped in
+    both modes.
+    """
+    if not isinstance(image_array, np.ndarray):
+        raise TypeError(f"image_array must be a NumPy array filled in place, got {type(image_array).__name__}")
+    image = image_array
+    height, width = image.shape[:2]
+    triangles = np.asarray(triangles)
+    if triangles.ndim != 3 or triangles.shape[1:] != (3, 2):
+        raise ValueError(f"triangles must have shape (T, 3, 2), got {triangles.shape}")
+    colors = np.broadcast_to(np.asarray(colors, dtype=image.dtype), (len(triangles),) + image.shape[2:])
+    if len(triangles) == 0:
+        return image
+
+    if subpixel_bits is None:
+        screen = triangles.astype(np.int64)
+    else:
+        screen = np.rint(triangles * (1 << subpixel_bits)).astype(np.int64)
+    setup, idx, box, box_sizes = _setup_triangles(screen, width, height, subpixel_bits)
+
+    # Index of the last fragment per pixel; reset after every run so it stays -1 elsewhere
+    owner = np.full(height * width, -1, dtype=np.int64)
+    for start, stop in _batch_ranges(box_sizes, max_fragments):
+        tri, x, y, _, _ = _cover_run(setup, idx[start:stop], box[start:stop], box_sizes[start:stop],
+                                     edge_values=False)
+        if len(tri) == 0:
+            continue
+        # Fragments come in triangle order, so the highest index per pixel is the last triangle drawn
+        pixel = y * width + x
+        fragment = np.arange(len(pixel))
+        np.maximum.at(owner, pixel, fragment)
+        last = fragment[owner[pixel] == fragment]
+        image[y[last], x[last]] = colors[tri[last]]
+        owner[pixel] = -1
+    return image
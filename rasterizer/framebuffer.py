@@ -0,0 +1,40 @@
+"""
+Preallocated framebuffer.
+
+One (H, W, 3) uint8 color array and one (H, W) depth array, allocated once
+and cleared in place between frames. The drawing functions take
+fb.color_buffer and fb.z_buffer like the arrays from new_buffers, and
+copy() hands the finished image on as one array.
+"""
+import numpy as np
+
+
+# === FRAMEBUFFER ===
+class FrameBuffer:
+    """
+    Reusable color and depth buffers of one screen size.
+
+    Depth is float32 by default, half the memory traffic of float64; the
+    rasterizer still resolves depth per batch in float64.
+    """
+    def __init__(self, width, height, background=(0, 0, 0), depth_dtype=np.float32):
+        self.width = width
+        self.height = height
+        self.background = np.array(background, dtype=np.uint8)
+        self.color_buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self.z_buffer = np.empty((height, width), dtype=depth_dtype)
+        self.clear()
+
+    def clear(self, background=None):
+        """ Resets color to the background and depth to inf, without reallocating """
+        if background is not None:
+            self.background = np.array(background, dtype=np.uint8)
+        if not self.background.any():
+            self.color_buffer.fill(0)
+        else:
+            self.color_buffer[:] = self.background
+        self.z_buffer.fill(np.inf)
+
+    def copy(self):
+        """ Independent copy of the color array, for handing a frame to another thread """
+        return self.color_buffer.copy()
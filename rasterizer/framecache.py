@@ -0,0 +1,115 @@
+"""
+Content-addressed frame cache.
+
+A rendered frame is stored under the SHA-256 of everything that determines
+its pixels: the caller's inputs (mesh content hash, transformation matrix,
+light, material, resolution, options) plus renderer_version(), a hash of
+the rasterizer modules that produce the image. Re-running a render with the
+same inputs loads the frame instead of drawing it; changing any input, or
+the drawing code, changes the key.
+
+Frames are raw .npy files in one directory, written atomically so several
+worker processes can share it. The directory is bounded in bytes; when it
+grows past the limit the least recently used frames (oldest mtime, bumped
+on every hit) are deleted.
+"""
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = 'frame_cache'
+DEFAULT_MAX_BYTES = 512 << 20
+
+# Modules whose code decides the pixels of a frame; editing any of them invalidates every cached frame
+RENDER_MODULES = ('culling', 'deferred', 'framebuffer', 'hiz', 'lod', 'meshcache', 'normals', 'objloader',
+                  'raster', 'renderer', 'scene', 'shading', 'tiles', 'transform')
+
+
+# === CACHE KEY ===
+@functools.lru_cache(maxsize=None)
+def renderer_version():
+    """ SHA-256 over the source of RENDER_MODULES """
+    sha = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for name in RENDER_MODULES:
+        with open(os.path.join(package, name + '.py'), 'rb') as f:
+            sha.update(name.encode() + b'\0' + f.read())
+    return sha.hexdigest()
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, '__dict__'):
+        return vars(value)
+    raise TypeError(f"cannot hash {type(value).__name__} into a frame key")
+
+def frame_key(**inputs):
+    """
+    Hex key of one frame. Arrays are hashed by dtype, shape and bytes;
+    everything else as JSON (objects such as Light / Material by their
+    attributes).
+    """
+    sha = hashlib.sha256(renderer_version().encode())
+    for name in sorted(inputs):
+        value = inputs[name]
+        sha.update(b'\0' + name.encode() + b'\0')
+        if isinstance(value, np.ndarray):
+            sha.update(f"{value.dtype.str}{value.shape}".encode())
+            sha.update(np.ascontiguousarray(value).tobytes())
+        else:
+            sha.update(json.dumps(value, sort_keys=True, default=_json_default).encode())
+    return sha.hexdigest()
+
+
+# === FRAME CACHE ===
+class FrameCache:
+    """ Directory of frames keyed by frame_key, bounded to max_bytes """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def get(self, key):
+        """ The cached (H, W, 3) frame, or None """
+        path = self._path(key)
+        try:
+            frame = np.load(path)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return frame
+
+    def put(self, key, frame):
+        tmp = os.path.join(self.directory, f'{key}.{os.getpid()}.tmp.npy')
+        np.save(tmp, np.ascontiguousarray(frame))
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """ Deletes least recently used frames until the directory fits in max_bytes """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy') and '.tmp.' not in entry.name:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker evicted it first
+            total -= size
@@ -0,0 +1,211 @@
+"""
+Hierarchical Z-buffer occlusion culling.
+
+The depth buffer is a float32 array padded to a whole number of tiles. On
+top of it sits a pyramid of coarse depth bounds: level 0 holds the min/max
+depth of every tile x tile block, each further level the min/max of 2x2
+cells of the level below. A triangle whose nearest vertex is farther than
+the farthest depth stored anywhere under its bounding box cannot pass a
+single z-test, so it is rejected before any per-pixel work.
+"""
+import numpy as np
+
+from .deferred import GBuffer
+from .raster import MAX_BATCH_FRAGMENTS, draw_colors_batch, rasterize_batch
+from .shading import corner_colors, phong_colors
+
+DEFAULT_TILE = 8
+DEFAULT_CHUNK = 4096
+
+
+# === DEPTH PYRAMID ===
+def _reduce_2x2(level, reduce, identity):
+    """ Halves a level; odd sizes are padded with the reduction's identity """
+    h, w = level.shape
+    padded = np.full(((h + 1) // 2 * 2, (w + 1) // 2 * 2), identity, dtype=level.dtype)
+    padded[:h, :w] = level
+    return reduce(padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2), axis=(1, 3))
+
+class HierarchicalZ:
+    """
+    float32 depth buffer plus min/max depth pyramid.
+
+    Render into hiz.z_buffer (an (H, W) view of the padded depth array) and
+    call update(...) for the screen region that changed so the pyramid stays
+    conservative.
+    """
+    def __init__(self, width, height, tile=DEFAULT_TILE, dtype=np.float32):
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.tile_shift = int(tile).bit_length() - 1
+        if 1 << self.tile_shift != tile:
+            raise ValueError(f"tile size must be a power of two, got {tile}")
+        tiles_y = -(-height // tile)
+        tiles_x = -(-width // tile)
+        self.depth = np.full((tiles_y * tile, tiles_x * tile), np.inf, dtype=dtype)
+        self.z_buffer = self.depth[:height, :width]
+        # Submission index of the triangle that wrote each pixel, for depth ties between chunks
+        self.owner = np.full((height, width), -1, dtype=np.int32)
+        self.max_levels = []
+        self.min_levels = []
+        self.update()
+
+    def clear(self):
+        self.depth.fill(np.inf)
+        self.update()
+
+    def _tiles(self):
+        t = self.tile
+        return self.depth.reshape(self.depth.shape[0] // t, t, self.depth.shape[1] // t, t)
+
+    def update(self, min_xy=None, max_xy=None):
+        """ Recomputes the tiles overlapping the pixel rectangle min_xy..max_xy (everything by default) """
+        tiles = self._tiles()
+        if not self.max_levels or min_xy is None:
+            self.max_levels = [tiles.max(axis=(1, 3))]
+            self.min_levels = [tiles.min(axis=(1, 3))]
+        else:
+            x0, y0 = (max(int(c), 0) >> self.tile_shift for c in min_xy)
+            x1, y1 = ((int(c) >> self.tile_shift) + 1 for c in max_xy)
+            region = tiles[y0:y1, :, x0:x1, :]
+            self.max_levels[0][y0:y1, x0:x1] = region.max(axis=(1, 3))
+            self.min_levels[0][y0:y1, x0:x1] = region.min(axis=(1, 3))
+        del self.max_levels[1:], self.min_levels[1:]
+        while self.max_levels[-1].size > 1:
+            self.max_levels.append(_reduce_2x2(self.max_levels[-1], np.max, -np.inf))
+            self.min_levels.append(_reduce_2x2(self.min_levels[-1], np.min, np.inf))
+
+    def depth_bounds(self, min_xy, max_xy):
+        """
+        Conservative (min, max) depth under each of T pixel rectangles.
+
+        Every rectangle is looked up at the coarsest pyramid level where it
+        spans at most 2x2 cells, so the cost is four reads per rectangle
+        regardless of its size.
+        """
+        min_xy = np.clip(np.asarray(min_xy), 0, (self.width - 1, self.height - 1))
+        max_xy = np.clip(np.asarray(max_xy), 0, (self.width - 1, self.height - 1))
+        span = np.max(max_xy - min_xy, axis=1) >> self.tile_shift
+        level = np.zeros(len(span), dtype=np.int64)
+        nonzero = span > 0
+        level[nonzero] = np.floor(np.log2(span[nonzero])).astype(np.int64) + 1
+        level = np.minimum(level, len(self.max_levels) - 1)
+
+        zmin = np.empty(len(span), dtype=self.depth.dtype)
+        zmax = np.empty(len(span), dtype=self.depth.dtype)
+        for lvl in np.unique(level):
+            sel = level == lvl
+            shift = self.tile_shift + int(lvl)
+            x0, y0 = (min_xy[sel] >> shift).T
+            x1, y1 = (max_xy[sel] >> shift).T
+            max_level, min_level = self.max_levels[lvl], self.min_levels[lvl]
+            corners_max = [max_level[y, x] for y in (y0, y1) for x in (x0, x1)]
+            corners_min = [min_level[y, x] for y in (y0, y1) for x in (x0, x1)]
+            zmax[sel] = np.maximum.reduce(corners_max)
+            zmin[sel] = np.minimum.reduce(corners_min)
+        return zmin, zmax
+
+    def occluded(self, min_xy, max_xy, nearest_z):
+        """ True for rectangles whose nearest depth is behind everything already drawn there """
+        _, zmax = self.depth_bounds(min_xy, max_xy)
+        return np.asarray(nearest_z) > zmax
+
+
+# === OCCLUSION-CULLED DRAWING ===
+def draw_phong_hiz(screen, verts, normals, color_buffer, hiz, material, light, deferred=False,
+                   chunk_size=DEFAULT_CHUNK, front_to_back=True, stats=None,
+                   max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None, shading='phong', instrument=None,
+                   colors=None, gbuffer=None):
+    """
+    Draws triangles in chunks, rejecting occluded work against hiz first.
+
+    Takes the same triangle arrays as draw_phong_batch and depth-tests
+    against hiz.z_buffer. Each chunk is first tested as a whole (union
+    bounding box, nearest vertex), then triangle by triangle; after the
+    chunk is rasterized, the pyramid is refreshed for its screen area.
+    With front_to_back=True triangles are sorted by their nearest vertex so
+    the early chunks occlude the later ones; hiz.owner then breaks depth
+    ties by submission index, so the image is the one drawn in submission
+    order. With deferred=True chunks only
+    fill a G-buffer and Phong lighting runs once at the end; pass a GBuffer
+    of the screen size to reuse its arrays across frames.
+    With shading='flat' or 'gouraud' the chunks go through draw_colors_batch
+    instead of lighting every pixel, and deferred is ignored; colors takes
+    precomputed colors as in draw_batch.
+    If a CullStats is passed, rejected triangles are added to stats.occluded.
+    instrument is an optional Instrumentation (see instrument.py); it counts
+    the triangles that reach the rasterizer, the occluded ones are left to
+    stats.
+    """
+    screen = np.asarray(screen)
+    verts = np.asarray(verts)
+    normals = np.asarray(normals)
+    if len(screen) == 0:
+        return
+
+    # At the depth buffer's precision, like the z-test, so a rejected triangle cannot have tied
+    nearest_z = verts[:, :, 2].min(axis=1).astype(hiz.depth.dtype)
+    order = np.argsort(nearest_z, kind='stable') if front_to_back else np.arange(len(screen))
+    min_xy = screen.min(axis=1)
+    max_xy = screen.max(axis=1)
+    if subpixel_bits is not None:
+        min_xy = min_xy >> subpixel_bits
+        max_xy = max_xy >> subpixel_bits
+    if shading != 'phong':
+        deferred = False
+        if colors is None:
+            colors = corner_colors(verts, normals, material, light, shading)
+            if instrument is not None:
+                instrument.count(shading_calls=colors.size // 3)
+    if deferred and gbuffer is None:
+        gbuffer = GBuffer(hiz.width, hiz.height)
+    elif deferred:
+        gbuffer.clear()
+    if front_to_back:
+        # Pixels drawn before this call win their ties, as earlier submissions
+        hiz.owner.fill(-1)
+    owner = hiz.owner if front_to_back else None
+
+    occluded = 0
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        chunk_min = min_xy[chunk].min(axis=0)
+        chunk_max = max_xy[chunk].max(axis=0)
+        if hiz.occluded(chunk_min[None], chunk_max[None], nearest_z[chunk].min()[None])[0]:
+            occluded += len(chunk)
+            continue
+
+        hidden = hiz.occluded(min_xy[chunk], max_xy[chunk], nearest_z[chunk])
+        occluded += int(hidden.sum())
+        chunk = chunk[~hidden]
+        if len(chunk) == 0:
+            continue
+        if front_to_back:
+            # Keep submission order inside the chunk so equal-depth ties resolve as before
+            chunk = np.sort(chunk)
+
+        if shading != 'phong':
+            draw_colors_batch(screen[chunk], verts[chunk], colors[chunk], color_buffer, hiz.z_buffer,
+                              max_fragments, subpixel_bits, instrument, chunk, owner)
+        else:
+            for y, x, pos, norm in rasterize_batch(screen[chunk], verts[chunk], normals[chunk], hiz.z_buffer,
+                                                   max_fragments, subpixel_bits, instrument, chunk, owner):
+                if deferred:
+                    gbuffer.position[y, x] = pos
+                    gbuffer.normal[y, x] = norm
+                    gbuffer.depth[y, x] = hiz.z_buffer[y, x]
+                else:
+                    color_buffer[y, x] = phong_colors(pos, norm, material, light)
+                    if instrument is not None:
+                        instrument.count(shading_calls=len(y))
+        hiz.update(min_xy[chunk].min(axis=0), max_xy[chunk].max(axis=0))
+
+    if deferred:
+        y, x = np.nonzero(gbuffer.covered())
+        if len(y):
+            color_buffer[y, x] = phong_colors(gbuffer.position[y, x], gbuffer.normal[y, x], material, light)
+        if instrument is not None:
+            instrument.count(shading_calls=len(y))
+    if stats is not None:
+        stats.occluded += occluded
@@ -0,0 +1,84 @@
+"""
+Instanced rendering.
+
+Draws K copies of one mesh, each under its own 4x4 matrix, from a single
+shared vertex / face / normal buffer. Whole instances are culled first by
+their bounding sphere against the view frustum; the survivors are
+transformed as a stack of matrices in one product, culled per triangle and
+handed to the usual batch rasterizer, a chunk of instances at a time, so
+every copy lands in the same depth buffer.
+"""
+import numpy as np
+
+from .culling import cull_triangles
+from .transform import max_scale, project_vertices
+
+# Upper bound on triangles transformed together (about 200 MB of per-triangle arrays)
+MAX_INSTANCE_TRIANGLES = 1 << 19
+
+# Distance of a point from the side planes |x| = z, |y| = z of the project_vertices frustum
+_PLANE_SCALE = np.sqrt(0.5)
+
+
+# === INSTANCE CULLING ===
+def cull_instances(matrices, radius):
+    """
+    Boolean (K,) mask of the instances that can cover a pixel.
+
+    matrices is (K, 4, 4), each mapping the mesh's space (centered on its
+    origin) to view space, and radius the bounding-sphere radius in that
+    space. An instance is dropped when its sphere lies entirely behind the
+    camera or outside one of the four side planes of the pinhole frustum
+    (x / z and y / z within -1 .. 1, as project_vertices maps them).
+    """
+    matrices = np.asarray(matrices, dtype=np.float64)
+    x, y, z = matrices[:, :3, 3].T
+    r = radius * max_scale(matrices)
+    return ((z > -r) & ((x - z) * _PLANE_SCALE < r) & ((-x - z) * _PLANE_SCALE < r) &
+            ((y - z) * _PLANE_SCALE < r) & ((-y - z) * _PLANE_SCALE < r))
+
+def add_cull_stats(total, stats):
+    """ Adds the counts of one CullStats to another, for frames drawn in several batches """
+    for name in ('submitted', 'behind', 'offscreen', 'degenerate', 'backfacing', 'occluded'):
+        setattr(total, name, getattr(total, name) + getattr(stats, name))
+    return total
+
+
+# === INSTANCE BATCHES ===
+def instance_batches(level, model_views, width, height, backface=True, subpixel_bits=None,
+                     max_triangles=MAX_INSTANCE_TRIANGLES, shade=None):
+    """
+    Yields (screen, verts, normals, stats, colors) for chunks of instances of one MeshLevel.
+
+    model_views is (K, 4, 4), one model-view matrix per instance. The
+    level's vertices and normals are shared: each chunk transforms them by
+    all of its matrices at once and indexes the results with the same faces.
+    The arrays are the culled (T, 3, 2) / (T, 3, 3) triangles of the chunk,
+    instance by instance in submission order, as draw_phong_batch takes
+    them; stats is the chunk's CullStats. shade, if given, is called as
+    shade(vertices, normals, faces) with the chunk's (N, 3) view-space
+    vertices and normals and the (T, 3) faces that survived culling, e.g.
+    to light each vertex once (tier_colors); colors is its result, or None.
+    """
+    model_views = np.asarray(model_views, dtype=np.float64)
+    faces = level.faces
+    per_chunk = max(1, max_triangles // max(len(faces), 1))
+    for start in range(0, len(model_views), per_chunk):
+        matrices = model_views[start:start + per_chunk]
+        count = len(matrices)
+        # (N, 4) @ (k, 4, 3) -> (k, N, 3): every instance's view-space vertices from one product
+        view_vertices = level.vertices @ matrices[:, :3].transpose(0, 2, 1)
+        # Normals get the linear part only; shading renormalizes them, so a uniform scale is harmless
+        normals = level.normals @ matrices[:, :3, :3].transpose(0, 2, 1)
+        screen = project_vertices(view_vertices.reshape(-1, 3), width, height, subpixel_bits)
+
+        # Faces of instance i index vertices i * N .. i * N + N - 1 of the flattened arrays
+        tri_faces = (faces + len(level.vertices) * np.arange(count)[:, None, None]).reshape(-1, 3)
+        tri_screen = screen[tri_faces]
+        tri_verts = view_vertices.reshape(-1, 3)[tri_faces]
+        keep, stats = cull_triangles(tri_screen, tri_verts, width, height, backface=backface,
+                                     subpixel_bits=subpixel_bits)
+        tri_faces = tri_faces[keep]
+        normals = normals.reshape(-1, 3)
+        colors = None if shade is None else shade(view_vertices.reshape(-1, 3), normals, tri_faces)
+        yield tri_screen[keep], tri_verts[keep], normals[tri_faces], stats, colors
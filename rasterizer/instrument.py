@@ -0,0 +1,163 @@
+"""
+Opt-in rasterizer instrumentation.
+
+Pass an Instrumentation as instrument= to the drawing functions to collect
+
+    counters  - triangles submitted / culled / rasterized / drawn, bounding-box
+                pixels tested vs covered, z-test passes / fails, shading calls
+    overdraw  - (H, W) count of covered fragments per pixel, saved as a heatmap
+    trace     - wall time per stage in Chrome trace-event format, open the JSON
+                file in chrome://tracing or https://ui.perfetto.dev
+
+Every hook in the raster path is guarded by `if instrument is not None`, once
+per batch rather than per pixel, so leaving instrument=None costs nothing.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+from PIL import Image
+
+COUNTERS = ('triangles_submitted', 'triangles_culled', 'triangles_rasterized', 'triangles_drawn',
+            'pixels_tested', 'pixels_covered', 'ztest_passed', 'ztest_failed', 'shading_calls')
+
+# Heatmap colors for 0, 1, 2, 3, 4+ fragments per pixel
+HEATMAP = np.array([
+    [0, 0, 0],
+    [0, 0, 160],
+    [0, 170, 60],
+    [240, 220, 0],
+    [230, 30, 20],
+], dtype=np.float64)
+
+
+# === INSTRUMENTATION ===
+class Instrumentation:
+    """
+    Counters, overdraw buffer and trace events of one or more frames.
+
+    The object may be shared by threads (see tiles.py); counters are updated
+    under a lock and tile() hands out views of the overdraw buffer.
+    """
+    def __init__(self, width, height, overdraw=True):
+        self.width = width
+        self.height = height
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.overdraw = np.zeros((height, width), dtype=np.int32) if overdraw else None
+        self.events = []
+        self._lock = threading.Lock()
+
+    def count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += int(amount)
+
+    def count_cull(self, stats):
+        """ Takes triangle counts from the CullStats of cull_triangles """
+        self.count(triangles_submitted=stats.submitted, triangles_culled=stats.culled)
+
+    def add_overdraw(self, y, x):
+        if self.overdraw is not None:
+            np.add.at(self.overdraw, (y, x), 1)
+
+    def tile(self, x0, y0, x1, y1):
+        """ View of this object for a screen tile: shared counters, overdraw sliced to the tile """
+        return _TileView(self, x0, y0, x1, y1)
+
+    def stage(self, name, **args):
+        """ Context manager recording one complete ('X') trace event for the enclosed code """
+        return _TraceStage(self, name, args)
+
+    def add_event(self, name, start_us, duration_us, args=None):
+        event = {'name': name, 'ph': 'X', 'ts': start_us, 'dur': duration_us,
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def merge(self, other):
+        """ Adds another Instrumentation's counters, overdraw and events (e.g. from a worker process) """
+        self.count(**other.counters)
+        if self.overdraw is not None and other.overdraw is not None:
+            self.overdraw += other.overdraw
+        with self._lock:
+            self.events.extend(other.events)
+
+    def __getstate__(self):
+        # The lock stays behind when a worker process sends its results back
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # === OUTPUT ===
+    def overdraw_image(self):
+        """ (H, W, 3) uint8 heatmap of the overdraw buffer """
+        levels = np.minimum(self.overdraw, len(HEATMAP) - 1)
+        return HEATMAP[levels].astype(np.uint8)
+
+    def save_overdraw(self, path):
+        Image.fromarray(self.overdraw_image()).save(path)
+
+    def write_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def __str__(self):
+        c = self.counters
+        tested = c['pixels_tested']
+        covered = c['pixels_covered']
+        lines = [
+            f"triangles: {c['triangles_submitted']} submitted, {c['triangles_culled']} culled, "
+            f"{c['triangles_rasterized']} rasterized, {c['triangles_drawn']} drawn",
+            f"pixels: {tested} tested, {covered} covered ({covered / tested:.0%} of tested)" if tested
+            else "pixels: 0 tested",
+            f"z-test: {c['ztest_passed']} passed, {c['ztest_failed']} failed",
+            f"shading calls: {c['shading_calls']}",
+        ]
+        if self.overdraw is not None and self.overdraw.any():
+            drawn = self.overdraw[self.overdraw > 0]
+            lines.append(f"overdraw: {drawn.mean():.2f} fragments per covered pixel, max {drawn.max()}")
+        return "\n".join(lines)
+
+class _TileView:
+    def __init__(self, parent, x0, y0, x1, y1):
+        self.parent = parent
+        self.overdraw = None if parent.overdraw is None else parent.overdraw[y0:y1, x0:x1]
+
+    def count(self, **amounts):
+        self.parent.count(**amounts)
+
+    def add_overdraw(self, y, x):
+        if self.overdraw is not None:
+            np.add.at(self.overdraw, (y, x), 1)
+
+    def stage(self, name, **args):
+        return self.parent.stage(name, **args)
+
+class _TraceStage:
+    def __init__(self, instrument, name, args):
+        self.instrument = instrument
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.instrument.add_event(self.name, self.start / 1000, (end - self.start) / 1000, self.args)
+
+def stage(instrument, name, **args):
+    """ instrument.stage(name) or a no-op context when instrument is None """
+    if instrument is None:
+        return nullcontext()
+    return instrument.stage(name, **args)
@@ -0,0 +1,153 @@
+"""
+Keyframe animation specs.
+
+An animation file (JSON, or TOML for a .toml path) gives the frame count
+and a list of keyframes. Every field is interpolated linearly between the
+keyframes around a frame; a keyframe that leaves a field out keeps the
+value of the keyframe before it, and frames outside the keyframes hold the
+first / last one:
+
+    {
+      "frames": 60,
+      "fps": 20,
+      "keyframes": [
+        {"frame": 0,  "angle": 0,   "light": [0, 0, 2]},
+        {"frame": 30, "light": [2, 2, 0], "diffuse": [0.1, 0.3, 0.8]},
+        {"frame": 60, "angle": 360, "light": [0, 0, 2]}
+      ]
+    }
+
+Keyframe fields, with the Lab_3 turntable as defaults:
+
+    angle        rotation around Y in degrees
+    scale        factor on the mesh's normalization scale
+    translation  model position in view space
+    light, intensity
+    diffuse, specular, shininess
+"""
+import json
+
+DEFAULT_FPS = 20
+
+FIELDS = {
+    'angle': 0.0,
+    'scale': 1.0,
+    'translation': (0.0, 0.0, 2.5),
+    'light': (0.0, 0.0, 2.0),
+    'intensity': (1.0, 1.0, 1.0),
+    'diffuse': (0.8, 0.1, 0.1),
+    'specular': (1.0, 1.0, 1.0),
+    'shininess': 32.0,
+}
+
+
+# === ANIMATION ===
+def _field(name, value):
+    default = FIELDS[name]
+    if isinstance(default, tuple):
+        if not isinstance(value, (list, tuple)) or len(value) != len(default):
+            raise ValueError(f"keyframe field {name} must be a list of {len(default)} numbers, got {value!r}")
+        return tuple(float(v) for v in value)
+    return float(value)
+
+def _lerp(a, b, t):
+    if isinstance(a, tuple):
+        return tuple(x + (y - x) * t for x, y in zip(a, b))
+    return a + (b - a) * t
+
+class Animation:
+    """
+    frames is the number of frames (0 .. frames - 1), keyframes a list of
+    (frame, fields) sorted by frame with every field of FIELDS filled in.
+    """
+    def __init__(self, frames, keyframes, fps=DEFAULT_FPS):
+        if frames < 1:
+            raise ValueError(f"an animation needs at least one frame, got {frames}")
+        if not keyframes:
+            raise ValueError("an animation needs at least one keyframe")
+        self.frames = frames
+        self.keyframes = keyframes
+        self.fps = fps
+
+    @classmethod
+    def from_spec(cls, spec):
+        """ Builds an Animation from the parsed file contents (a dict); raises ValueError if it is malformed """
+        if not isinstance(spec, dict):
+            raise ValueError("an animation must be an object with frames and keyframes")
+        if 'frames' not in spec:
+            raise ValueError("an animation needs a 'frames' count")
+        keys = spec.get('keyframes', [])
+        for key in keys:
+            if not isinstance(key, dict) or 'frame' not in key:
+                raise ValueError(f"every keyframe needs a 'frame' number, got {key!r}")
+        keyframes = []
+        values = dict(FIELDS)
+        for key in sorted(keys, key=lambda key: key['frame']):
+            unknown = set(key) - set(FIELDS) - {'frame'}
+            if unknown:
+                raise ValueError(f"unknown keyframe fields: {', '.join(sorted(unknown))}")
+            values = dict(values, **{name: _field(name, value) for name, value in key.items() if name != 'frame'})
+            keyframes.append((float(key['frame']), values))
+        return cls(int(spec['frames']), keyframes, spec.get('fps', DEFAULT_FPS))
+
+    @classmethod
+    def turntable(cls, frames, fps=DEFAULT_FPS, **fields):
+        """ One full turn around Y over frames, the original hardwired animation """
+        return cls.from_spec({'frames': frames, 'fps': fps,
+                              'keyframes': [dict(fields, frame=0, angle=0), {'frame': frames, 'angle': 360}]})
+
+    def at(self, frame):
+        """ Dict of every field at frame """
+        keyframes = self.keyframes
+        if frame <= keyframes[0][0]:
+            return dict(keyframes[0][1])
+        for (f0, a), (f1, b) in zip(keyframes, keyframes[1:]):
+            if frame < f1:
+                t = (frame - f0) / (f1 - f0)
+                return {name: _lerp(a[name], b[name], t) for name in FIELDS}
+        return dict(keyframes[-1][1])
+
+def load_animation(path):
+    """ Reads an animation file; .toml files need Python 3.11+ (tomllib) """
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            return Animation.from_spec(tomllib.load(f))
+    with open(path) as f:
+        return Animation.from_spec(json.load(f))
+
+
+# === FRAME SELECTION ===
+def parse_frame_range(text, total):
+    """
+    Frames selected by 'a:b' (a inclusive, b exclusive, either may be left
+    out, like a Python slice) or by a single frame number, as a range.
+    """
+    start, sep, stop = text.partition(':')
+    try:
+        start = int(start) if start else 0
+        stop = (int(stop) if stop else total) if sep else start + 1
+    except ValueError:
+        raise ValueError(f"frame range must look like a:b, got {text!r}") from None
+    if not 0 <= start <= stop <= total:
+        raise ValueError(f"frame range {text!r} must satisfy 0 <= a <= b <= {total}")
+    return range(start, stop)
+
+def parse_shard(text):
+    """ 'i/N' -> (i, N), with shards numbered 0 .. N - 1 """
+    index, sep, count = text.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {text!r}") from None
+    if not sep or count < 1 or not 0 <= index < count:
+        raise ValueError(f"shard must be i/N with 0 <= i < N, got {text!r}")
+    return index, count
+
+def shard_frames(frames, index, count):
+    """
+    Every count-th frame starting at index. Interleaving spreads cheap and
+    expensive stretches of the sequence evenly, and the split depends only
+    on the frame list, so every node computes the same shards.
+    """
+    return frames[index::count]
@@ -0,0 +1,320 @@
+"""
+Level of detail through quadric error metric (QEM) edge collapse.
+
+Every vertex carries the sum of the squared-distance quadrics of the planes
+of its triangles. Collapsing an edge (u, v) merges both quadrics and moves u
+to the point that minimizes the merged error; the cheapest collapse is always
+taken next. Collapses that would flip a triangle or pinch the surface are
+skipped.
+
+A single simplification run takes snapshots whenever the face count drops
+below the next target, so a chain of levels with `ratio` times fewer faces
+each costs no more than its coarsest level. The chain is stored in the
+mesh's cache directory (man.obj.cache/lod.json plus lodK_*.npy) next to the
+arrays written by meshcache.py.
+"""
+import heapq
+import json
+import math
+import os
+
+import numpy as np
+
+from .meshcache import ARRAYS, cache_dir_for, load_mesh
+from .normals import face_normals, vertex_normals
+
+LOD_VERSION = 1
+DEFAULT_RATIO = 0.5
+DEFAULT_MIN_FACES = 512
+# Screen pixels one triangle should cover on average before a finer level is used
+DEFAULT_PIXELS_PER_TRIANGLE = 4
+BOUNDARY_WEIGHT = 100.0
+
+
+# === QUADRICS ===
+def face_quadrics(vertices, faces):
+    """ (F, 4, 4) area-weighted plane quadrics p p^T with p = (n, -n . v0) """
+    normals = face_normals(vertices, faces)
+    double_area = np.linalg.norm(normals, axis=1)
+    n = normals / np.where(double_area > 0, double_area, 1.0)[:, None]
+    p = np.hstack((n, -np.einsum('ij,ij->i', n, vertices[faces[:, 0]])[:, None]))
+    return (double_area / 2)[:, None, None] * p[:, :, None] * p[:, None, :]
+
+def vertex_quadrics(vertices, faces):
+    """
+    Sums every face quadric into its three vertices. Open boundary edges add
+    a heavily weighted plane through the edge, perpendicular to its face, so
+    the outline of an open mesh does not shrink.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    Q = np.zeros((len(vertices), 4, 4))
+    fq = face_quadrics(vertices, faces)
+    for k in range(3):
+        np.add.at(Q, faces[:, k], fq)
+
+    edges = np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]))
+    owner = np.tile(np.arange(len(faces)), 3)
+    _, inverse, counts = np.unique(np.sort(edges, axis=1), axis=0, return_inverse=True, return_counts=True)
+    boundary = counts[inverse.ravel()] == 1
+    if boundary.any():
+        a, b = vertices[edges[boundary, 0]], vertices[edges[boundary, 1]]
+        n = np.cross(b - a, face_normals(vertices, faces[owner[boundary]]))
+        length = np.linalg.norm(n, axis=1)
+        n = n / np.where(length > 0, length, 1.0)[:, None]
+        p = np.hstack((n, -np.einsum('ij,ij->i', n, a)[:, None]))
+        bq = BOUNDARY_WEIGHT * p[:, :, None] * p[:, None, :]
+        np.add.at(Q, edges[boundary, 0], bq)
+        np.add.at(Q, edges[boundary, 1], bq)
+    return Q
+
+def _quadric_error(Q, points):
+    """ x^T Q x for (K, 4, 4) quadrics and (K, 3) points """
+    x = np.hstack((points, np.ones((len(points), 1))))
+    return np.einsum('ki,kij,kj->k', x, Q, x)
+
+def collapse_targets(Q, a, b):
+    """
+    Best position and error for collapsing K edges with merged quadrics Q.
+
+    The minimizer of the quadric is used where its 3x3 system is well
+    conditioned; the two endpoints and the midpoint are always candidates,
+    so flat or degenerate neighborhoods still get a sensible position.
+    """
+    candidates = [a, b, (a + b) / 2]
+    A = Q[:, :3, :3]
+    scale = np.abs(A).max(axis=(1, 2))
+    det = np.linalg.det(A)
+    solvable = np.abs(det) > 1e-9 * np.maximum(scale, 1e-300) ** 3
+    if solvable.any():
+        optimal = candidates[2].copy()
+        optimal[solvable] = np.linalg.solve(A[solvable], -Q[solvable, :3, 3][:, :, None])[:, :, 0]
+        candidates.append(optimal)
+    errors = np.stack([_quadric_error(Q, c) for c in candidates])
+    best = np.argmin(errors, axis=0)
+    rows = np.arange(len(Q))
+    return np.stack(candidates)[best, rows], errors[best, rows]
+
+
+# === EDGE COLLAPSE ===
+class _Simplifier:
+    """ Mutable half-simplified mesh: positions, quadrics, faces and vertex -> face sets """
+    def __init__(self, vertices, faces):
+        self.pos = np.array(vertices, dtype=np.float64)
+        self.faces = np.array(faces, dtype=np.int64)
+        self.Q = vertex_quadrics(self.pos, self.faces)
+        self.face_alive = np.ones(len(self.faces), dtype=bool)
+        self.face_count = len(self.faces)
+        self.version = np.zeros(len(self.pos), dtype=np.int64)
+        self.vertex_faces = [set() for _ in range(len(self.pos))]
+        for f, tri in enumerate(self.faces.tolist()):
+            for vert in tri:
+                self.vertex_faces[vert].add(f)
+        self.heap = []
+
+        edges = np.unique(np.sort(np.concatenate(
+            (self.faces[:, [0, 1]], self.faces[:, [1, 2]], self.faces[:, [2, 0]])), axis=1), axis=0)
+        self._push(edges[:, 0], edges[:, 1])
+        heapq.heapify(self.heap)
+
+    def _push(self, u, v):
+        targets, errors = collapse_targets(self.Q[u] + self.Q[v], self.pos[u], self.pos[v])
+        entries = zip(errors.tolist(), u.tolist(), v.tolist(), self.version[u].tolist(),
+                      self.version[v].tolist(), targets.tolist())
+        if self.heap:
+            for entry in entries:
+                heapq.heappush(self.heap, entry)
+        else:
+            self.heap.extend(entries)
+
+    def neighbors(self, u):
+        return {w for f in self.vertex_faces[u] for w in self.faces[f].tolist()} - {u}
+
+    def _flips(self, moved, corner, target):
+        """ True if moving the given corner of each moved face to target flips one of them """
+        if not moved:
+            return False
+        tri = self.pos[self.faces[moved]]
+        before = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        tri[np.arange(len(moved)), corner] = target
+        after = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        return bool(np.any(np.einsum('ij,ij->i', before, after) <= 0))
+
+    def collapse(self, u, v, target):
+        """ Merges v into u at target; returns False (and changes nothing) if the collapse is unsafe """
+        faces_u, faces_v = self.vertex_faces[u], self.vertex_faces[v]
+        shared = faces_u & faces_v
+        # Link condition: u and v may only share the neighbors of the faces being removed
+        if len(self.neighbors(u) & self.neighbors(v)) != len(shared):
+            return False
+
+        moved = sorted((faces_u | faces_v) - shared)
+        rows = self.faces[moved]
+        corner = np.argmax((rows == u) | (rows == v), axis=1)
+        if self._flips(moved, corner, target):
+            return False
+
+        for f in shared:
+            self.face_alive[f] = False
+            self.face_count -= 1
+            for vert in self.faces[f].tolist():
+                self.vertex_faces[vert].discard(f)
+        for f in faces_v - shared:
+            row = self.faces[f]
+            row[row == v] = u
+            faces_u.add(f)
+        self.vertex_faces[v] = set()
+
+        self.pos[u] = target
+        self.Q[u] += self.Q[v]
+        self.version[u] += 1
+        self.version[v] = -1
+        around = np.array(sorted(self.neighbors(u)), dtype=np.int64)
+        if len(around):
+            self._push(np.full(len(around), u), around)
+        return True
+
+    def run(self, targets):
+        """ Collapses edges until each face count in targets (descending) is reached; yields a snapshot per target """
+        targets = list(targets)
+        while targets and self.heap:
+            if self.face_count <= targets[0]:
+                yield self.snapshot()
+                targets.pop(0)
+                continue
+            error, u, v, ver_u, ver_v, target = heapq.heappop(self.heap)
+            if self.version[u] != ver_u or self.version[v] != ver_v:
+                continue  # stale: an endpoint moved or died since this entry was pushed
+            self.collapse(u, v, target)
+        if targets and self.face_count < len(self.faces):
+            yield self.snapshot()
+
+    def snapshot(self):
+        """ Compact (vertices, faces) of the current state, dropping unused vertices """
+        faces = self.faces[self.face_alive]
+        used, inverse = np.unique(faces, return_inverse=True)
+        return self.pos[used].copy(), inverse.reshape(faces.shape).astype(np.int32)
+
+def simplify(vertices, faces, target_faces):
+    """ Simplifies an indexed triangle mesh to at most target_faces faces (fewer if the mesh allows) """
+    for level in _Simplifier(vertices, faces).run([target_faces]):
+        return level
+    return np.asarray(vertices, dtype=np.float64), np.asarray(faces, dtype=np.int32)
+
+def lod_targets(face_count, ratio=DEFAULT_RATIO, min_faces=DEFAULT_MIN_FACES):
+    """ Face counts of the levels below the full mesh: face_count * ratio**k down to min_faces """
+    targets = []
+    count = face_count
+    while count * ratio >= min_faces:
+        count = int(count * ratio)
+        targets.append(count)
+    return targets
+
+
+# === LOD CHAIN ===
+class LodLevel:
+    """ One level of a LodChain, with the same arrays as CachedMesh """
+    def __init__(self, vertices, faces, normals):
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+
+class LodChain:
+    """
+    Levels from the full mesh (levels[0]) to the coarsest simplification.
+
+    radius is the bounding-sphere radius of the source mesh around its
+    bounding-box center, used to estimate the projected size.
+    """
+    def __init__(self, levels, radius):
+        self.levels = levels
+        self.radius = radius
+
+    @property
+    def face_counts(self):
+        return [len(level.faces) for level in self.levels]
+
+    def select(self, screen_area, pixels_per_triangle=DEFAULT_PIXELS_PER_TRIANGLE):
+        """
+        Index of the coarsest level that still has one triangle per
+        pixels_per_triangle covered pixels; the full mesh if none has.
+        """
+        budget = screen_area / pixels_per_triangle
+        index = 0
+        for k, count in enumerate(self.face_counts):
+            if count >= budget:
+                index = k
+        return index
+
+def projected_area(radius, depth, width, height):
+    """
+    Pixel area of a sphere of the given view-space radius at view depth,
+    under the pinhole mapping of project_vertices; capped at the screen.
+    """
+    if depth <= radius:
+        return float(width * height)
+    pixels = radius / depth * width / 2
+    return min(math.pi * pixels * pixels, float(width * height))
+
+def build_lod_chain(vertices, faces, center, ratio=DEFAULT_RATIO, min_faces=DEFAULT_MIN_FACES):
+    """ Simplified levels (without the full mesh) as a list of LodLevel; normals as in build_cache """
+    levels = []
+    for verts, tris in _Simplifier(vertices, faces).run(lod_targets(len(faces), ratio, min_faces)):
+        levels.append(LodLevel(verts, tris, vertex_normals(verts - center, tris)))
+    return levels
+
+
+# === CACHE ===
+def _lod_path(cache_dir, level, name):
+    return os.path.join(cache_dir, f'lod{level}_{name}.npy')
+
+def _read_lod_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'lod.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_lod_chain(path, cache_dir=None, rebuild=False, mmap=True, ratio=DEFAULT_RATIO,
+                   min_faces=DEFAULT_MIN_FACES, mesh=None):
+    """
+    Loads the LOD chain of an OBJ through its cache directory, simplifying
+    the mesh once if lod.json is missing, stale or was built with other
+    parameters. Pass the CachedMesh if it is already loaded.
+    """
+    cache_dir = cache_dir or cache_dir_for(path)
+    mesh = mesh or load_mesh(path, cache_dir, mmap=mmap)
+    key = {
+        'version': LOD_VERSION,
+        'source_sha256': mesh.source_sha256,
+        'ratio': ratio,
+        'min_faces': min_faces,
+    }
+    meta = None if rebuild else _read_lod_meta(cache_dir)
+    if meta is None or any(meta.get(k) != v for k, v in key.items()):
+        meta = _build_lod_cache(mesh, cache_dir, key)
+
+    mode = 'r' if mmap else None
+    levels = [LodLevel(mesh.vertices, mesh.faces, mesh.normals)]
+    for k in range(1, len(meta['face_counts'])):
+        levels.append(LodLevel(*(np.load(_lod_path(cache_dir, k, name), mmap_mode=mode) for name in ARRAYS)))
+    radius = float(np.linalg.norm(mesh.bounds_max - mesh.bounds_min) / 2)
+    return LodChain(levels, radius)
+
+def _build_lod_cache(mesh, cache_dir, key):
+    """ Simplifies mesh and writes lodK_*.npy plus lod.json (last, as the commit marker) """
+    levels = build_lod_chain(mesh.vertices, mesh.faces, mesh.center, key['ratio'], key['min_faces'])
+    meta_path = os.path.join(cache_dir, 'lod.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for k, level in enumerate(levels, start=1):
+        for name in ARRAYS:
+            tmp = os.path.join(cache_dir, f'lod{k}_{name}.{os.getpid()}.tmp.npy')
+            np.save(tmp, np.ascontiguousarray(getattr(level, name)))
+            os.replace(tmp, _lod_path(cache_dir, k, name))
+    meta = dict(key, face_counts=[len(mesh.faces)] + [len(level.faces) for level in levels])
+    tmp = os.path.join(cache_dir, f'lod.json.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)
+    return meta
@@ -0,0 +1,150 @@
+"""
+Compiled mesh cache.
+
+The first load of an OBJ parses it and writes a cache directory next to it
+(man.obj -> man.obj.cache/) holding raw .npy arrays plus a small meta.json:
+
+    vertices.npy  (N, 3) float64  positions as stored in the OBJ
+    faces.npy     (F, 3) int32    triangle indices
+    normals.npy   (N, 3) float32  area-weighted vertex normals
+    meta.json     source size / mtime / sha256, bounds, center and extent
+
+Later loads validate meta.json against the source file and open the arrays
+with np.load(mmap_mode='r'), so the vertex data is memory-mapped, not copied.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .normals import vertex_normals
+from .objloader import load_obj
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.cache'
+ARRAYS = ('vertices', 'faces', 'normals')
+
+
+class CachedMesh:
+    """ Geometry and normalization parameters of one OBJ file """
+    def __init__(self, vertices, faces, normals, meta):
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+        self.bounds_min = np.array(meta['bounds_min'])
+        self.bounds_max = np.array(meta['bounds_max'])
+        self.center = np.array(meta['center'])
+        self.extent = meta['extent']
+        self.source_sha256 = meta['source_sha256']
+
+    def normalization_scale(self, size):
+        """ Scale that makes the largest side of the bounding box equal to size """
+        return size / self.extent
+
+
+# === SOURCE PARSING ===
+def parse_obj(path):
+    """ Parses an OBJ into (vertices, faces) arrays, with every polygon triangulated """
+    obj = load_obj(path)
+    return obj.vertices, obj.faces
+
+
+# === CACHE KEY ===
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def cache_dir_for(path):
+    return path + CACHE_SUFFIX
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_meta(cache_dir, meta):
+    tmp = os.path.join(cache_dir, f'meta.json.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(cache_dir, 'meta.json'))
+
+def _is_fresh(meta, path, stat):
+    """
+    A cache is fresh when it was built by this CACHE_VERSION from a file with
+    the same content. Size and mtime are checked first; only when the mtime
+    changed is the file hashed again (e.g. after a checkout or a copy).
+    """
+    if meta is None or meta.get('version') != CACHE_VERSION or meta['source_size'] != stat.st_size:
+        return False
+    if meta['source_mtime_ns'] == stat.st_mtime_ns:
+        return True
+    return meta['source_sha256'] == file_digest(path)
+
+
+# === BUILD & LOAD ===
+def build_cache(path, cache_dir=None, parser=parse_obj):
+    """ Parses path and (re)writes its cache directory; returns the meta dictionary """
+    cache_dir = cache_dir or cache_dir_for(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(path)
+    digest = file_digest(path)
+
+    vertices, faces = parser(path)
+    bounds_min = vertices.min(axis=0)
+    bounds_max = vertices.max(axis=0)
+    center = (bounds_min + bounds_max) / 2
+    normals = vertex_normals(vertices - center, faces)
+
+    # meta.json is the commit marker: drop it first, write it last
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for name, array in zip(ARRAYS, (vertices, faces, normals)):
+        tmp = os.path.join(cache_dir, f'{name}.{os.getpid()}.tmp.npy')
+        np.save(tmp, np.ascontiguousarray(array))
+        os.replace(tmp, os.path.join(cache_dir, f'{name}.npy'))
+
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.basename(path),
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_sha256': digest,
+        'vertex_count': len(vertices),
+        'face_count': len(faces),
+        'bounds_min': bounds_min.tolist(),
+        'bounds_max': bounds_max.tolist(),
+        'center': center.tolist(),
+        'extent': float(np.max(bounds_max - bounds_min)),
+    }
+    _write_meta(cache_dir, meta)
+    return meta
+
+def load_mesh(path, cache_dir=None, rebuild=False, mmap=True, parser=parse_obj):
+    """
+    Loads an OBJ through its compiled cache, building the cache if it is
+    missing or stale.
+
+    With mmap=True the arrays are read-only np.memmap views of the cache
+    files; pass mmap=False to get ordinary in-memory arrays.
+    """
+    cache_dir = cache_dir or cache_dir_for(path)
+    stat = os.stat(path)
+    meta = None if rebuild else _read_meta(cache_dir)
+
+    if not _is_fresh(meta, path, stat):
+        meta = build_cache(path, cache_dir, parser)
+    elif meta['source_mtime_ns'] != stat.st_mtime_ns:
+        # Same content under a new mtime: remember it so the next load skips hashing
+        meta['source_mtime_ns'] = stat.st_mtime_ns
+        _write_meta(cache_dir, meta)
+
+    mode = 'r' if mmap else None
+    arrays = [np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode=mode) for name in ARRAYS]
+    return CachedMesh(*arrays, meta)
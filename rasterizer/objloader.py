@@ -0,0 +1,144 @@
+"""
+Streaming Wavefront OBJ reader.
+
+Reads the file in chunks of lines and converts each chunk straight into
+NumPy arrays, so only one chunk of text is held as Python objects at a time.
+Polygons with more than three vertices are fan-triangulated in the same
+vertex order as pywavefront: (v1, v2, v3) first, then (vj, v1, vj-1) for
+every further vertex vj.
+"""
+import re
+
+import numpy as np
+
+# Bytes of text converted per chunk
+CHUNK_SIZE = 4 << 20
+
+# v[/vt][/vn] corner of an f statement
+_CORNER = re.compile(r'(-?\d+)(?:/(-?\d*)(?:/(-?\d+))?)?')
+
+
+class ObjMesh:
+    """
+    Arrays read from an OBJ file.
+
+    vertices (N, 3) float64, faces (F, 3) int32 triangle indices into
+    vertices, normals (M, 3) float64 from vn statements and normal_indices
+    (F, 3) int32 into normals (None when some face corner has no normal).
+    """
+    def __init__(self, vertices, faces, normals, normal_indices):
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+        self.normal_indices = normal_indices
+
+
+# === CHUNK CONVERSION ===
+def _parse_floats(lines, prefix_len):
+    """ First three numbers of every line as an (n, 3) array """
+    values = ' '.join(line[prefix_len:] for line in lines).split()
+    if len(values) == 3 * len(lines):
+        return np.array(values, dtype=np.float64).reshape(-1, 3)
+    # Some lines carry extra components (w or vertex colors)
+    return np.array([line.split()[1:4] for line in lines], dtype=np.float64)
+
+def _resolve(indices, counts_before):
+    """ OBJ indices are 1-based; negative ones count back from the last element defined so far """
+    return np.where(indices < 0, indices + counts_before, indices - 1)
+
+def _triangulate(corners, sizes):
+    """
+    Fan-triangulates polygons stored back to back in corners.
+
+    sizes holds the vertex count of every polygon; polygons with fewer than
+    three vertices are dropped. Returns (T, 3) positions into corners.
+    """
+    starts = np.cumsum(sizes) - sizes
+    tri_counts = np.maximum(sizes - 2, 0)
+    start = np.repeat(starts, tri_counts)
+    k = np.arange(len(start)) - np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts)
+    first = k == 0
+    return np.stack((
+        np.where(first, start, start + k + 2),
+        np.where(first, start + 1, start),
+        np.where(first, start + 2, start + k + 1),
+    ), axis=1)
+
+def _parse_faces(lines, vertex_counts, normal_counts):
+    """ Converts f lines into (T, 3) vertex and normal index arrays """
+    tokens = []
+    sizes = np.empty(len(lines), dtype=np.int64)
+    for i, line in enumerate(lines):
+        parts = line.split()
+        sizes[i] = len(parts) - 1
+        tokens.extend(parts[1:])
+
+    corners = _CORNER.findall(' '.join(tokens))
+    v = np.array([c[0] for c in corners], dtype=np.int64)
+    v = _resolve(v, np.repeat(vertex_counts, sizes))
+
+    vn = None
+    vn_text = [c[2] for c in corners]
+    if all(vn_text):
+        vn = _resolve(np.array(vn_text, dtype=np.int64), np.repeat(normal_counts, sizes))
+
+    triangles = _triangulate(v, sizes)
+    faces = v[triangles]
+    face_normals = vn[triangles] if vn is not None else None
+    return faces, face_normals
+
+
+# === READER ===
+def _read_chunks(path, chunk_size):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            lines = f.readlines(chunk_size)
+            if not lines:
+                return
+            yield lines
+
+def load_obj(path, chunk_size=CHUNK_SIZE):
+    """ Reads v, vn and f statements of an OBJ file into an ObjMesh """
+    vertex_chunks, normal_chunks, face_chunks, face_normal_chunks = [], [], [], []
+    vertex_count = 0
+    normal_count = 0
+    all_faces_have_normals = True
+
+    for lines in _read_chunks(path, chunk_size):
+        v_lines, vn_lines, f_lines = [], [], []
+        f_vertex_counts, f_normal_counts = [], []
+        for line in lines:
+            if line.startswith('v '):
+                v_lines.append(line)
+            elif line.startswith('f '):
+                f_lines.append(line)
+                # Counts seen so far, for resolving negative (relative) indices
+                f_vertex_counts.append(vertex_count + len(v_lines))
+                f_normal_counts.append(normal_count + len(vn_lines))
+            elif line.startswith('vn '):
+                vn_lines.append(line)
+
+        if v_lines:
+            vertex_chunks.append(_parse_floats(v_lines, 2))
+        if vn_lines:
+            normal_chunks.append(_parse_floats(vn_lines, 3))
+        if f_lines:
+            faces, face_normals = _parse_faces(f_lines, f_vertex_counts, f_normal_counts)
+            face_chunks.append(faces.astype(np.int32))
+            if face_normals is None:
+                all_faces_have_normals = False
+            else:
+                face_normal_chunks.append(face_normals.astype(np.int32))
+        vertex_count += len(v_lines)
+        normal_count += len(vn_lines)
+
+    vertices = np.concatenate(vertex_chunks) if vertex_chunks else np.zeros((0, 3))
+    normals = np.concatenate(normal_chunks) if normal_chunks else np.zeros((0, 3))
+    faces = np.concatenate(face_chunks) if face_chunks else np.zeros((0, 3), dtype=np.int32)
+    normal_indices = None
+    if all_faces_have_normals and face_normal_chunks:
+        normal_indices = np.concatenate(face_normal_chunks)
+
+    if len(faces) and (faces.min() < 0 or faces.max() >= len(vertices)):
+        raise ValueError(f"{path}: face references a vertex that does not exist")
+    return ObjMesh(vertices, faces, normals, normal_indices)
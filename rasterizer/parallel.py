@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+from contextlib import nullcontext
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+
+# === WORKER POOL ===
+def default_workers():
+    return os.cpu_count() or 1
+
+def _pool_context():
+    """
+    On Linux fork, so workers inherit the parent's loaded mesh arrays without
+    any pickling. Elsewhere the platform default (spawn on macOS and Windows,
+    where fork is unsafe): workers re-import the script and pick the mesh up
+    from its memory-mapped cache instead.
+    """
+    if sys.platform.startswith('linux'):
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+def open_pool(workers):
+    """
+    Process pool for render_frames, as a context manager; None for a single
+    worker. Open it before starting any thread (such as a FrameWriter's):
+    forking a process that already runs threads can deadlock the children.
+    """
+    if workers <= 1:
+        return nullcontext()
+    return _pool_context().Pool(workers)
+
+def render_frames(render_frame, frames, workers=None, max_pending=None, pool=None):
+    """
+    Calls render_frame(frame) for every frame, spread over a process pool.
+
+    render_frame must be a module-level function so it can be sent to the
+    workers by reference; only the frame number goes out and only the
+    finished image comes back. Results are yielded as (frame, result) in
+    the order of frames, whatever order the workers finish in.
+
+    At most max_pending frames (default: twice the worker count) are queued
+    or finished-but-unconsumed at any time, so a slow consumer such as a
+    video encoder keeps memory at a few frames.
+
+    pool is a pool from open_pool(workers) to run on; without one, render_frames
+    opens its own, which is only safe while the process runs no other threads.
+    """
+    frames = list(frames)
+    workers = min(workers or default_workers(), max(len(frames), 1))
+    if workers == 1:
+        for frame in frames:
+            yield frame, render_frame(frame)
+        return
+
+    max_pending = max(max_pending or 2 * workers, 1)
+    with nullcontext(pool) if pool is not None else open_pool(workers) as pool:
+        upcoming = iter(frames)
+        pending = deque((frame, pool.apply_async(render_frame, (frame,)))
+                        for frame in islice(upcoming, max_pending))
+        while pending:
+            frame, result = pending.popleft()
+            # Top the queue up before handing this frame over, so workers never idle on the consumer
+            for next_frame in islice(upcoming, 1):
+                pending.append((next_frame, pool.apply_async(render_frame, (next_frame,))))
+            yield frame, result.get()
+
+
+# === PROGRESS ===
+class Progress:
+    """ Prints one line per finished frame with throughput and remaining time """
+    def __init__(self, total, stream=sys.stdout):
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+        self.stream = stream
+
+    def update(self, frame, detail=None):
+        self.done += 1
+        elapsed = time.perf_counter() - self.start
+        fps = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / fps if fps > 0 else 0.0
+        print(f"Rendered frame {frame:03d} [{self.done}/{self.total}] "
+              f"{fps:.2f} frames/s, {remaining:.0f}s left" + (f" - {detail}" if detail else ""),
+              file=self.stream, flush=True)
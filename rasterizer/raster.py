@@ -0,0 +1,336 @@
+import numpy as np
+
+from .shading import corner_colors, phong_colors
+
+# Upper bound on candidate pixels evaluated in one batch (about 100 MB of temporaries)
+MAX_BATCH_FRAGMENTS = 1 << 20
+
+
+# === BUFFERS ===
+def new_buffers(width, height, background=(0, 0, 0)):
+    """ Returns an (H, W, 3) uint8 color buffer and an (H, W) depth buffer filled with inf """
+    color_buffer = np.empty((height, width, 3), dtype=np.uint8)
+    color_buffer[:] = background
+    z_buffer = np.full((height, width), np.inf)
+    return color_buffer, z_buffer
+
+
+# === EDGE FUNCTION ===
+def edge_func(a, b, c):
+    return (c[0] - a[0]) * (b[1] - a[1]) - (c[1] - a[1]) * (b[0] - a[0])
+
+
+# === TRIANGLE BATCHES ===
+def _batch_ranges(box_sizes, max_fragments):
+    """ Splits triangles into consecutive runs whose bounding boxes hold at most max_fragments pixels """
+    start = 0
+    total = 0
+    for i, size in enumerate(box_sizes.tolist()):
+        if total and total + size > max_fragments:
+            yield start, i
+            start, total = i, 0
+        total += size
+    if start < len(box_sizes):
+        yield start, len(box_sizes)
+
+def rasterize_batch(screen, verts, normals, z_buffer, max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None,
+                    instrument=None, ids=None, owner=None):
+    """
+    Rasterizes T triangles against z_buffer without shading them.
+
+    screen is a (T, 3, 2) integer array of projected vertices, verts and
+    normals are (T, 3, 3) arrays of view-space positions and vertex normals.
+    Triangles are split into runs of at most max_fragments bounding-box
+    pixels; for every run this updates z_buffer and yields (y, x, pos, norm)
+    for the fragments that passed the depth test, at most one per pixel.
+    Per pixel the nearest fragment wins and on equal depth the earlier
+    triangle wins, which matches drawing the triangles one by one.
+
+    With subpixel_bits=None screen holds whole pixels and coverage follows
+    the original inclusive edge test. With subpixel_bits=n screen holds
+    fixed-point coordinates with n fractional bits (see project_vertices),
+    pixels are sampled at their centers and shared edges follow the
+    top-left rule, so every pixel along an edge belongs to one triangle.
+    instrument is an optional Instrumentation (see instrument.py); ids and
+    owner are described in rasterize_fragments.
+    """
+    verts = np.asarray(verts, dtype=np.float64)
+    normals = np.asarray(normals, dtype=np.float64)
+    for tri, y, x, bary in rasterize_fragments(screen, verts[:, :, 2], z_buffer, max_fragments, subpixel_bits,
+                                               instrument, ids, owner):
+        yield y, x, interpolate(verts, tri, bary), interpolate(normals, tri, bary)
+
+def rasterize_fragments(screen, depth, z_buffer, max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None,
+                        instrument=None, ids=None, owner=None):
+    """
+    rasterize_batch without the attribute interpolation.
+
+    depth is the (T, 3) view-space z of every corner, the only attribute
+    the depth test needs. Yields (tri, y, x, bary) for the fragments that
+    passed: the index of their triangle, their pixel and their (F, 3, 1)
+    barycentric weights, for interpolate(...) to blend whatever the caller
+    shades with.
+
+    Depth is compared at the precision of z_buffer, so the winner of a pixel
+    does not depend on how the triangles were split into runs. Triangles
+    drawn out of submission order (e.g. sorted front to back) pass ids, the
+    (T,) submission index of every triangle, and owner, an (H, W) integer
+    array holding the index of the triangle that wrote each pixel (-1 for
+    none yet); on equal depth the lower index then wins, as if the triangles
+    had been drawn in submission order.
+    """
+    height, width = z_buffer.shape
+    screen = np.asarray(screen, dtype=np.int64)
+    depth = np.asarray(depth, dtype=np.float64)
+    if len(screen) == 0:
+        return
+
+    setup, idx, box, box_sizes = _setup_triangles(screen, width, height, subpixel_bits)
+    for start, stop in _batch_ranges(box_sizes, max_fragments):
+        fragments = _rasterize_run(setup, depth, idx[start:stop], box[start:stop], box_sizes[start:stop],
+                                   z_buffer, instrument, ids, owner)
+        if fragments is not None:
+            yield fragments
+
+def interpolate(values, tri, bary):
+    """ Blends the (T, 3, k) corner values of triangles tri with the barycentric weights from rasterize_fragments """
+    tv = values[tri]
+    return bary[:, 0] * tv[:, 0] + bary[:, 1] * tv[:, 1] + bary[:, 2] * tv[:, 2]
+
+
+# === TRIANGLE SETUP ===
+class _EdgeSetup:
+    """
+    Per-triangle edge functions E(x, y) = E0 + x * step_x + y * step_y, with
+    (x, y) pixel offsets from the bounding-box corner min_xy. Edge i is the
+    one opposite vertex i, so E_i / area is the i-th barycentric weight.
+    A pixel is covered when E_i + bias_i > 0 for all three edges.
+    """
+    def __init__(self, area, min_xy, max_xy, e0, step_x, step_y, bias, inclusive):
+        self.area = area
+        self.min_xy = min_xy
+        self.max_xy = max_xy
+        self.e0 = e0
+        self.step_x = step_x
+        self.step_y = step_y
+        self.bias = bias
+        self.inclusive = inclusive
+
+def _setup_triangles(screen, width, height, subpixel_bits):
+    """
+    Edge setup for (T, 3, 2) screen triangles under either fill rule, plus
+    the indices, bounding-box sizes (w, h) and pixel counts of the triangles
+    that have area and overlap the image.
+    """
+    if subpixel_bits is None:
+        setup = _setup_inclusive(screen, width, height)
+    else:
+        setup = _setup_fixed(screen, width, height, subpixel_bits)
+    keep = (setup.area != 0) & np.all(setup.min_xy <= setup.max_xy, axis=1)
+    idx = np.nonzero(keep)[0]
+    box = setup.max_xy[idx] - setup.min_xy[idx] + 1
+    return setup, idx, box, box[:, 0] * box[:, 1]
+
+def _edge_coefficients(screen):
+    """ (A, B, C) of edge_func for the three edges (p2, p3), (p3, p1), (p1, p2), each (T, 3) """
+    a = screen[:, [1, 2, 0]]
+    b = screen[:, [2, 0, 1]]
+    A = b[:, :, 1] - a[:, :, 1]
+    B = a[:, :, 0] - b[:, :, 0]
+    C = -a[:, :, 0] * A - a[:, :, 1] * B
+    return A, B, C
+
+def _setup_inclusive(screen, width, height):
+    """ Original rule: pixel corners at integer coordinates, both windings, edges inclusive """
+    min_xy = np.maximum(screen.min(axis=1), 0)
+    max_xy = np.minimum(screen.max(axis=1), (width - 1, height - 1))
+    A, B, C = _edge_coefficients(screen)
+    area = edge_func(screen[:, 0].T, screen[:, 1].T, screen[:, 2].T)
+    e0 = A * min_xy[:, 0, None] + B * min_xy[:, 1, None] + C
+    return _EdgeSetup(area, min_xy, max_xy, e0, A, B, None, inclusive=True)
+
+def _setup_fixed(screen, width, height, bits):
+    """
+    Fixed-point rule: coordinates carry `bits` fractional bits, pixels are
+    sampled at their centers, and edges are flipped so the inside is
+    positive whatever the winding. An edge whose inside lies to its right
+    (A > 0) or below a horizontal edge (A == 0, B > 0) is a top or left
+    edge and owns the samples that lie exactly on it.
+    """
+    if bits < 1:
+        raise ValueError("fixed-point rasterization needs at least one subpixel bit")
+    one = 1 << bits
+    half = one >> 1
+    lo = screen.min(axis=1) - half
+    hi = screen.max(axis=1) - half
+    min_xy = np.maximum(-(-lo >> bits), 0)
+    max_xy = np.minimum(hi >> bits, (width - 1, height - 1))
+
+    A, B, C = _edge_coefficients(screen)
+    area = edge_func(screen[:, 0].T, screen[:, 1].T, screen[:, 2].T)
+    sign = np.where(area < 0, -1, 1)[:, None]
+    A, B, C = A * sign, B * sign, C * sign
+    area = area * sign[:, 0]
+
+    # Edge values at the center of the bounding-box corner pixel, then whole-pixel steps
+    cx = (min_xy[:, 0, None] << bits) + half
+    cy = (min_xy[:, 1, None] << bits) + half
+    e0 = A * cx + B * cy + C
+    top_left = (A > 0) | ((A == 0) & (B > 0))
+    return _EdgeSetup(area, min_xy, max_xy, e0, A << bits, B << bits, top_left.astype(np.int64),
+                      inclusive=False)
+
+
+# === RASTER RUN ===
+def _cover_run(setup, tris, box, box_sizes, edge_values=True):
+    """
+    Coverage test for a run of triangles: (tri, x, y, w, tested) for the
+    covered pixels in triangle order, w being their (N, 3) edge values (None
+    with edge_values=False) and tested the number of candidate pixels.
+    """
+    # One candidate per bounding-box pixel of every triangle in the run, row after row
+    tri = np.repeat(tris, box_sizes)
+    rows = box[:, 1]
+    row_tri = np.repeat(np.arange(len(tris)), rows)
+    row_dy = np.arange(len(row_tri)) - np.repeat(np.cumsum(rows) - rows, rows)
+    row_w = box[row_tri, 0]
+    row_start = np.cumsum(row_w) - row_w
+
+    # Edge values are stepped, not evaluated per pixel: E at the start of every row comes from
+    # the setup, and along the row each pixel adds step_x to its left neighbour. A running sum
+    # over the flat candidate array does the adds; at every row start the increment is the jump
+    # from the end of the previous row instead. All values are integers, so the sums are exact.
+    edges = []
+    for i in range(3):
+        step_x = setup.step_x[tris, i]
+        first = setup.e0[tris, i][row_tri] + row_dy * setup.step_y[tris, i][row_tri]
+        last = first + (row_w - 1) * step_x[row_tri]
+        steps = np.repeat(step_x, box_sizes)
+        steps[row_start[1:]] = first[1:] - last[:-1]
+        steps[0] = first[0]
+        edges.append(np.cumsum(steps, out=steps))
+    e0, e1, e2 = edges
+    if setup.inclusive:
+        inside = ((e0 >= 0) & (e1 >= 0) & (e2 >= 0)) | ((e0 <= 0) & (e1 <= 0) & (e2 <= 0))
+    else:
+        bias = [np.repeat(setup.bias[tris, i], box_sizes) for i in range(3)]
+        inside = (e0 + bias[0] > 0) & (e1 + bias[1] > 0) & (e2 + bias[2] > 0)
+
+    # Pixel coordinates only for the covered candidates: their row, then the offset into it
+    covered = np.flatnonzero(inside)
+    row = np.searchsorted(row_start, covered, side='right') - 1
+    tri = tri[covered]
+    x = setup.min_xy[tri, 0] + (covered - row_start[row])
+    y = setup.min_xy[tri, 1] + row_dy[row]
+    w = np.stack([e[covered] for e in edges], axis=1) if edge_values else None
+    return tri, x, y, w, len(inside)
+
+def _rasterize_run(setup, depth, tris, box, box_sizes, z_buffer, instrument=None, ids=None, owner=None):
+    tri, x, y, w, tested = _cover_run(setup, tris, box, box_sizes)
+    if instrument is not None:
+        instrument.count(triangles_rasterized=len(tris), pixels_tested=tested, pixels_covered=len(tri))
+        instrument.add_overdraw(y, x)
+    if len(tri) == 0:
+        return None
+    bary = (w / setup.area[tri, None])[:, :, None]
+    return _resolve_depth(tri, x, y, bary, depth, z_buffer, instrument, ids, owner)
+
+def _resolve_depth(tri, x, y, bary, depth, z_buffer, instrument=None, ids=None, owner=None):
+    """ Depth-tests covered fragments: nearest per pixel, earliest triangle on ties """
+    width = z_buffer.shape[1]
+    # Only z is interpolated for every fragment; other attributes wait until the winners are known.
+    # Rounded to the buffer's precision first, so a tie is a tie within a run and across runs alike
+    z = interpolate(depth, tri, bary[:, :, 0]).astype(z_buffer.dtype, copy=False)
+
+    win = _nearest_fragments(tri, y * width + x, z, z_buffer.size)
+    stored = z_buffer[y[win], x[win]]
+    passed = z[win] < stored
+    if owner is not None:
+        passed |= (z[win] == stored) & (ids[tri[win]] < owner[y[win], x[win]])
+    win = win[passed]
+    if instrument is not None:
+        instrument.count(ztest_passed=len(win), ztest_failed=len(tri) - len(win),
+                         triangles_drawn=len(np.unique(tri[win])))
+    if len(win) == 0:
+        return None
+
+    wy, wx = y[win], x[win]
+    z_buffer[wy, wx] = z[win]
+    if owner is not None:
+        owner[wy, wx] = ids[tri[win]]
+    return tri[win], wy, wx, bary[win]
+
+def _nearest_fragments(tri, pixel, z, pixel_count):
+    """ Index of the winning fragment per covered pixel: smallest z, then earliest triangle """
+    if len(pixel) * 4 < pixel_count:
+        # Few fragments: sorting them is cheaper than clearing per-pixel scratch arrays
+        order = np.lexsort((tri, z, pixel))
+        pixel_sorted = pixel[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pixel_sorted[1:] != pixel_sorted[:-1]
+        return order[first]
+    # Nearest depth per pixel, then among the fragments at that depth the first one,
+    # which is the earliest triangle since fragments come in triangle order
+    nearest = np.full(pixel_count, np.inf)
+    np.minimum.at(nearest, pixel, z)
+    fragment = np.flatnonzero(z == nearest[pixel])
+    owner = np.full(pixel_count, len(pixel))
+    np.minimum.at(owner, pixel[fragment], fragment)
+    return fragment[owner[pixel[fragment]] == fragment]
+
+def draw_phong_batch(screen, verts, normals, color_buffer, z_buffer, material, light,
+                     max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None, instrument=None):
+    """
+    Rasterizes T triangles with Phong shading and a z-test.
+
+    Takes the same arrays as rasterize_batch. With subpixel_bits=None the
+    image matches the per-pixel draw_phong loop in the Lab_3 scripts.
+    """
+    for y, x, pos, norm in rasterize_batch(screen, verts, normals, z_buffer, max_fragments, subpixel_bits,
+                                           instrument):
+        color_buffer[y, x] = phong_colors(pos, norm, material, light)
+        if instrument is not None:
+            instrument.count(shading_calls=len(y))
+
+def draw_colors_batch(screen, verts, colors, color_buffer, z_buffer, max_fragments=MAX_BATCH_FRAGMENTS,
+                      subpixel_bits=None, instrument=None, ids=None, owner=None):
+    """
+    Rasterizes T triangles with precomputed colors, as made by tier_colors
+    or corner_colors. No lighting runs per pixel: (T, 3, 3) corner colors
+    are interpolated across each triangle, (T, 3) colors are written as
+    they are and only depth is interpolated. ids and owner are described
+    in rasterize_fragments.
+    """
+    verts = np.asarray(verts, dtype=np.float64)
+    colors = np.asarray(colors)
+    flat = colors.ndim == 2
+    colors = np.rint(colors).astype(np.uint8) if flat else colors.astype(np.float64)
+    for tri, y, x, bary in rasterize_fragments(screen, verts[:, :, 2], z_buffer, max_fragments, subpixel_bits,
+                                               instrument, ids, owner):
+        if flat:
+            color_buffer[y, x] = colors[tri]
+        else:
+            color_buffer[y, x] = np.rint(interpolate(colors, tri, bary)).astype(np.uint8)
+
+def draw_batch(screen, verts, normals, color_buffer, z_buffer, material, light, shading='phong',
+               max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None, instrument=None, colors=None):
+    """
+    draw_phong_batch with a selectable quality tier (see SHADING_MODES):
+
+        flat     - one lighting evaluation per triangle, one color per triangle
+        gouraud  - one lighting evaluation per vertex, colors interpolated
+        phong    - normals interpolated, lighting evaluated per pixel
+
+    colors takes the tier's colors when the caller already has them, e.g.
+    from tier_colors on an indexed mesh, which lights each shared vertex
+    once; otherwise they come from corner_colors.
+    """
+    if shading == 'phong':
+        draw_phong_batch(screen, verts, normals, color_buffer, z_buffer, material, light,
+                         max_fragments, subpixel_bits, instrument)
+        return
+    if colors is None:
+        colors = corner_colors(verts, normals, material, light, shading)
+        if instrument is not None:
+            instrument.count(shading_calls=colors.size // 3)
+    draw_colors_batch(screen, verts, colors, color_buffer, z_buffer, max_fragments, subpixel_bits, instrument)
@@ -0,0 +1,267 @@
+"""
+Reusable renderer.
+
+    mesh = Mesh.load('man.obj')
+    renderer = Renderer(mesh, material)
+    for angle in range(0, 360, 6):
+        image = renderer.render(Camera.turntable(512, 512, angle), [light])
+
+The Renderer keeps everything that does not change between frames: the
+mesh, and for the last few screen sizes the color / depth buffers,
+G-buffer and depth pyramid. render() only transforms, culls and rasterizes, with the same
+options and drawing paths as the Lab_3 scripts.
+"""
+import inspect
+from collections import OrderedDict
+
+import numpy as np
+
+from .culling import CullStats, cull_triangles
+from .deferred import GBuffer, draw_phong_deferred, rasterize_gbuffer, shade_gbuffer
+from .framebuffer import FrameBuffer
+from .hiz import HierarchicalZ, draw_phong_hiz
+from .instancing import add_cull_stats, cull_instances, instance_batches
+from .instrument import stage
+from .raster import draw_batch, draw_phong_batch
+from .shading import tier_colors
+from .strips import DEFAULT_BAND_HEIGHT, draw_phong_strips
+from .tiles import draw_phong_tiled
+from .transform import project_vertices, transform_vertices
+
+# Screen sizes whose buffers a Renderer keeps; the least recently used size is dropped beyond that
+DEFAULT_MAX_TARGETS = 2
+
+
+# === FRAME BUFFERS ===
+class _Targets:
+    """ Buffers of one screen size, cleared and reused by every render() call """
+    def __init__(self, width, height, background, occlusion_culling, deferred):
+        self.framebuffer = FrameBuffer(width, height, background)
+        self.hiz = HierarchicalZ(width, height) if occlusion_culling else None
+        self.gbuffer = GBuffer(width, height) if deferred else None
+
+    def clear(self, background):
+        self.framebuffer.clear(background)
+        if self.hiz is not None:
+            self.hiz.clear()
+
+
+# === RENDERER ===
+class Renderer:
+    """
+    Renders a Mesh with one Material from any Camera.
+
+    The options match the CONFIG flags of Lab_3/Shading/Version2_rotation.py.
+    last_stats holds the CullStats of the latest frame and last_level the
+    index of the LOD level it drew. Buffers are kept for the max_targets
+    most recently rendered screen sizes. With model_space_normals=True,
+    render() and render_strips() light with the vertex normals as loaded
+    instead of turning them with the camera, as the Lab_3 animation always
+    has.
+    """
+    def __init__(self, mesh, material, shading='phong', deferred=False, backface_culling=True,
+                 occlusion_culling=False, tile_size=None, level_of_detail=True, background=(0, 0, 0),
+                 max_targets=DEFAULT_MAX_TARGETS, model_space_normals=False):
+        self.mesh = mesh
+        self.material = material
+        self.shading = shading
+        self.deferred = deferred
+        self.backface_culling = backface_culling
+        self.occlusion_culling = occlusion_culling
+        self.tile_size = tile_size
+        self.level_of_detail = level_of_detail
+        self.background = background
+        self.last_stats = None
+        self.last_level = None
+        self.last_instances = None
+        self.max_targets = max_targets
+        self.model_space_normals = model_space_normals
+        self._targets = OrderedDict()
+
+    @property
+    def options(self):
+        """ Every constructor argument but mesh and material by name, e.g. for a frame cache key """
+        names = list(inspect.signature(Renderer.__init__).parameters)[3:]
+        return {name: getattr(self, name) for name in names}
+
+    def _targets_for(self, width, height):
+        targets = self._targets.get((width, height))
+        if targets is None:
+            targets = _Targets(width, height, self.background, self.occlusion_culling, self.deferred)
+            self._targets[width, height] = targets
+            while len(self._targets) > max(self.max_targets, 1):
+                self._targets.popitem(last=False)
+        else:
+            self._targets.move_to_end((width, height))
+            targets.clear(self.background)
+        return targets
+
+    def render(self, camera, lights, instrument=None, material=None, copy=True):
+        """
+        Draws the mesh as seen by camera and returns a new (H, W, 3) uint8 image.
+
+        lights is a Light or a list of Lights. instrument is an optional
+        Instrumentation (see instrument.py). material overrides the
+        Renderer's material for this frame. copy=False returns the
+        framebuffer's own color array instead, without copying; it is only
+        valid until the next render at the same screen size, so pass it on
+        only to consumers that are done with it by then.
+        """
+        width, height = camera.width, camera.height
+        bits = camera.subpixel_bits
+        targets = self._targets_for(width, height)
+        framebuffer = targets.framebuffer
+        color_buffer, z_buffer = framebuffer.color_buffer, framebuffer.z_buffer
+        material = self.material if material is None else material
+        tri_screen, tri_verts, tri_normals, colors, stats = self._geometry(camera, lights, material, instrument)
+
+        with stage(instrument, 'raster'):
+            if targets.hiz is not None:
+                draw_phong_hiz(tri_screen, tri_verts, tri_normals, color_buffer, targets.hiz, material, lights,
+                               deferred=self.deferred, stats=stats, subpixel_bits=bits, shading=self.shading,
+                               instrument=instrument, colors=colors, gbuffer=targets.gbuffer)
+            elif self.tile_size:
+                draw_phong_tiled(tri_screen, tri_verts, tri_normals, color_buffer, z_buffer, material,
+                                 lights, deferred=self.deferred, tile_size=self.tile_size, subpixel_bits=bits,
+                                 shading=self.shading, instrument=instrument, colors=colors)
+            elif self.shading != 'phong':
+                draw_batch(tri_screen, tri_verts, tri_normals, color_buffer, z_buffer, material, lights,
+                           shading=self.shading, subpixel_bits=bits, instrument=instrument, colors=colors)
+            elif self.deferred:
+                draw_phong_deferred(tri_screen, tri_verts, tri_normals, color_buffer, z_buffer, material,
+                                    lights, gbuffer=targets.gbuffer, subpixel_bits=bits, instrument=instrument)
+            else:
+                draw_phong_batch(tri_screen, tri_verts, tri_normals, color_buffer, z_buffer, material,
+                                 lights, subpixel_bits=bits, instrument=instrument)
+
+        if instrument is not None:
+            instrument.count_cull(stats)
+        self.last_stats = stats
+        return framebuffer.copy() if copy else color_buffer
+
+    def render_strips(self, camera, lights, writer, band_height=DEFAULT_BAND_HEIGHT, instrument=None,
+                      material=None):
+        """
+        Draws the same image as render() band by band into writer (see
+        strips.py and stream.py) instead of returning it, so frames far larger
+        than memory can be written. Occlusion culling and tiling do not apply
+        here; the bands take their place.
+        """
+        material = self.material if material is None else material
+        tri_screen, tri_verts, tri_normals, colors, stats = self._geometry(camera, lights, material, instrument)
+        with stage(instrument, 'raster'):
+            draw_phong_strips(tri_screen, tri_verts, tri_normals, camera.width, camera.height, material, lights,
+                              writer, band_height=band_height, deferred=self.deferred, shading=self.shading,
+                              background=self.background, subpixel_bits=camera.subpixel_bits,
+                              instrument=instrument, colors=colors)
+        if instrument is not None:
+            instrument.count_cull(stats)
+        self.last_stats = stats
+
+    def render_instances(self, camera, lights, instances, instrument=None, material=None, copy=True):
+        """
+        Draws one copy of the mesh per (4, 4) matrix in instances, a (K, 4, 4)
+        array of model transforms (e.g. from build_transformation_matrix), and
+        returns a new (H, W, 3) uint8 image.
+
+        Instances outside the view frustum are skipped by bounding sphere, and
+        with level_of_detail every instance picks its own level. The mesh data
+        is shared, all copies share one depth buffer and, when deferred, one
+        lighting pass. Occlusion culling and tiling do not apply here.
+        last_instances holds the indices of the instances that were drawn and
+        last_level their LOD levels. copy works as in render().
+        """
+        width, height = camera.width, camera.height
+        bits = camera.subpixel_bits
+        targets = self._targets_for(width, height)
+        framebuffer = targets.framebuffer
+        color_buffer, z_buffer = framebuffer.color_buffer, framebuffer.z_buffer
+        material = self.material if material is None else material
+        deferred = self.deferred and self.shading == 'phong'
+        if deferred:
+            targets.gbuffer.clear()
+
+        with stage(instrument, 'cull instances'):
+            world_view = camera.view @ np.asarray(instances, dtype=np.float64).reshape(-1, 4, 4)
+            radius = self.mesh.radius
+            if radius is None:
+                radius = np.linalg.norm(transform_vertices(self.mesh.levels[0].vertices, self.mesh.model), axis=1).max()
+            drawn = np.flatnonzero(cull_instances(world_view, radius))
+            model_views = world_view[drawn] @ self.mesh.model
+            if self.level_of_detail:
+                levels = np.array([self.mesh.select(mv, width, height) for mv in model_views], dtype=np.int64)
+            else:
+                levels = np.zeros(len(drawn), dtype=np.int64)
+
+        def shade(vertices, normals, faces):
+            return self._colors(vertices, normals, faces, material, lights, instrument)
+
+        stats = CullStats()
+        for index in np.unique(levels):
+            for tri_screen, tri_verts, tri_normals, batch_stats, colors in instance_batches(
+                    self.mesh.levels[index], model_views[levels == index], width, height,
+                    backface=self.backface_culling, subpixel_bits=bits, shade=shade):
+                add_cull_stats(stats, batch_stats)
+                with stage(instrument, 'raster', level=int(index), triangles=len(tri_screen)):
+                    if deferred:
+                        rasterize_gbuffer(tri_screen, tri_verts, tri_normals, targets.gbuffer,
+                                          subpixel_bits=bits, instrument=instrument)
+                    else:
+                        draw_batch(tri_screen, tri_verts, tri_normals, color_buffer, z_buffer, material,
+                                   lights, shading=self.shading, subpixel_bits=bits, instrument=instrument,
+                                   colors=colors)
+
+        if deferred:
+            # Lit once at the end, so pixels overdrawn by a later chunk are not shaded twice
+            with stage(instrument, 'lighting pass'):
+                shade_gbuffer(targets.gbuffer, material, lights, color_buffer)
+                z_buffer[:] = targets.gbuffer.depth
+            if instrument is not None:
+                instrument.count(shading_calls=int(targets.gbuffer.covered().sum()))
+        if instrument is not None:
+            instrument.count_cull(stats)
+        self.last_stats = stats
+        self.last_level = levels
+        self.last_instances = drawn
+        return framebuffer.copy() if copy else color_buffer
+
+    def _colors(self, vertices, normals, faces, material, lights, instrument):
+        """ tier_colors of the faces for the flat / gouraud tiers, lighting each vertex once; None for phong """
+        if self.shading == 'phong':
+            return None
+        with stage(instrument, 'vertex shading'):
+            colors = tier_colors(vertices, normals, faces, material, lights, self.shading)
+        if instrument is not None:
+            instrument.count(shading_calls=len(faces) if self.shading == 'flat' else len(np.unique(faces)))
+        return colors
+
+    def _geometry(self, camera, lights, material, instrument):
+        """
+        Transformed, projected and culled triangles of the LOD level for
+        camera, their colors for the flat / gouraud tiers and the CullStats.
+        """
+        width, height = camera.width, camera.height
+        bits = camera.subpixel_bits
+        model_view = camera.view @ self.mesh.model
+        index = self.mesh.select(model_view, width, height) if self.level_of_detail else 0
+        level = self.mesh.levels[index]
+        self.last_level = index
+
+        with stage(instrument, 'transform'):
+            faces = level.faces
+            view_vertices = transform_vertices(level.vertices, model_view)
+            if self.model_space_normals:
+                normal_array = level.normals
+            else:
+                # Normals only follow the camera's rotation; the model matrix is a uniform scale
+                normal_array = level.normals @ camera.view[:3, :3].T
+            screen = project_vertices(view_vertices, width, height, bits)
+            tri_screen = screen[faces]
+            tri_verts = view_vertices[faces]
+
+        with stage(instrument, 'cull'):
+            keep, stats = cull_triangles(tri_screen, tri_verts, width, height, backface=self.backface_culling,
+                                         subpixel_bits=bits)
+        faces = faces[keep]
+        colors = self._colors(view_vertices, normal_array, faces, material, lights, instrument)
+        return tri_screen[keep], tri_verts[keep], normal_array[faces], colors, stats
@@ -0,0 +1,100 @@
+"""
+Scene objects for the Renderer (see renderer.py).
+
+A Mesh is loaded once and keeps its geometry resident: centered homogeneous
+vertices, faces and vertex normals for the full mesh and every LOD level.
+A Camera is only a screen size plus a 4x4 view matrix, so any number of
+views can be rendered from the same Mesh.
+"""
+import numpy as np
+
+from .lod import LodChain, load_lod_chain, projected_area
+from .meshcache import load_mesh
+from .transform import build_transformation_matrix, max_scale, to_homogeneous
+
+
+# === LIGHTING ===
+class Light:
+    def __init__(self, position, intensity=(1, 1, 1)):
+        self.position = position
+        self.intensity = intensity
+
+class Material:
+    def __init__(self, diffuse, specular, shininess):
+        self.diffuse = diffuse
+        self.specular = specular
+        self.shininess = shininess
+
+
+# === CAMERA ===
+class Camera:
+    """
+    Pinhole camera: view is the 4x4 matrix from world to view space,
+    looking down +z as project_vertices expects.
+    """
+    def __init__(self, width, height, view=None, subpixel_bits=None):
+        self.width = width
+        self.height = height
+        self.view = np.identity(4) if view is None else np.asarray(view, dtype=np.float64)
+        self.subpixel_bits = subpixel_bits
+
+    @classmethod
+    def turntable(cls, width, height, angle_deg, distance=2.5, subpixel_bits=None):
+        """ The Lab_3 setup: the model turned angle_deg around Y and pushed distance into view """
+        return cls(width, height, build_transformation_matrix(angle_deg, 1, (0, 0, distance)), subpixel_bits)
+
+
+# === MESH ===
+class MeshLevel:
+    """ One level of detail: (N, 4) centered homogeneous vertices, (F, 3) faces, (N, 3) normals """
+    def __init__(self, vertices, faces, normals):
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+
+class Mesh:
+    """
+    Geometry kept in memory across frames.
+
+    levels[0] is the full mesh, further levels come from a LodChain. All
+    levels are centered on the source's bounding-box center; model is the
+    4x4 model matrix (a uniform scale to size by default) and radius the
+    bounding-sphere radius in model space after that scale. source_sha256
+    is the content hash of the loaded OBJ, e.g. for frame_key.
+    """
+    def __init__(self, levels, model=None, radius=None, source_sha256=None):
+        self.levels = levels
+        self.model = np.identity(4) if model is None else np.asarray(model, dtype=np.float64)
+        self.radius = radius
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def load(cls, path, size=2.5, lod=True):
+        """ Loads an OBJ through the mesh cache, normalized so its largest side is size """
+        mesh = load_mesh(path)
+        scale = mesh.normalization_scale(size)
+        sources = [mesh]
+        radius = float(np.linalg.norm(mesh.bounds_max - mesh.bounds_min) / 2) * scale
+        if lod:
+            chain = load_lod_chain(path, mesh=mesh)
+            sources = chain.levels
+            radius = chain.radius * scale
+        levels = [MeshLevel(to_homogeneous(level.vertices - mesh.center), np.asarray(level.faces),
+                            np.asarray(level.normals)) for level in sources]
+        return cls(levels, build_transformation_matrix(0, scale, (0, 0, 0)), radius, mesh.source_sha256)
+
+    @property
+    def face_counts(self):
+        return [len(level.faces) for level in self.levels]
+
+    def select(self, view, width, height):
+        """
+        Index of the level to draw under the 4x4 model-view matrix view (see
+        LodChain.select). view includes model, so any scale on top of it, such
+        as an instance's own, shrinks or grows the sphere accordingly.
+        """
+        if self.radius is None or len(self.levels) == 1:
+            return 0
+        radius = self.radius * max_scale(view) / max_scale(self.model)
+        depth = view[2, 3]  # the model is centered, so its origin is the sphere center
+        return LodChain(self.levels, radius).select(projected_area(radius, depth, width, height))
@@ -0,0 +1,336 @@
+"""
+Local render server.
+
+Keeps meshes (and their LOD chains) resident and renders jobs sent over
+localhost HTTP or a Unix socket, so a client pays neither Python startup
+nor mesh loading per image:
+
+    python -m rasterizer.server man.obj --port 8607
+    curl -o out.png "http://127.0.0.1:8607/render?angle=200&light=2,2,0&width=512&height=512"
+
+A job is the set of knobs of Lab_3/Shading/Version2_rotation.py, passed as
+query parameters or as a JSON object in a POST body:
+
+    mesh       one of the meshes given on the command line (default: the first)
+    width, height, angle (degrees), shading ('flat', 'gouraud', 'phong')
+    distance   camera distance, positive and at least the mesh's bounding radius
+    light, intensity          light position and color, e.g. light=2,2,0
+    diffuse, specular, shininess (shininess >= 0)
+
+The reply is a PNG with an X-Cache: hit / miss / joined header. Jobs run on
+a thread pool with one Renderer per thread (the NumPy kernels release the
+GIL). Concurrent requests for the same job share one render, and finished
+PNGs are kept in an LRU cache keyed by the normalized job. GET /stats
+returns the counters as JSON.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from PIL import Image
+
+from .parallel import default_workers
+from .renderer import Renderer
+from .scene import Camera, Light, Material, Mesh
+from .shading import SHADING_MODES
+
+DEFAULT_PORT = 8607
+DEFAULT_CACHE_BYTES = 256 << 20
+MAX_SIZE = 4096
+MAX_BODY = 1 << 16
+
+DEFAULT_JOB = {
+    'width': 1024, 'height': 1024, 'angle': 200.0, 'distance': 2.5, 'shading': 'phong',
+    'light': (2.0, 2.0, 0.0), 'intensity': (1.0, 1.0, 1.0),
+    'diffuse': (0.8, 0.1, 0.1), 'specular': (1.0, 1.0, 1.0), 'shininess': 32.0,
+}
+VECTORS = ('light', 'intensity', 'diffuse', 'specular')
+NUMBERS = ('angle', 'distance', 'shininess')
+
+
+class JobError(ValueError):
+    """ A request that cannot be turned into a render job; reported as 400 """
+
+
+# === JOBS ===
+def _vector(name, value):
+    if isinstance(value, str):
+        value = value.split(',')
+    try:
+        vector = tuple(float(v) for v in value)
+    except (TypeError, ValueError):
+        raise JobError(f"{name} must be three numbers, got {value!r}") from None
+    if len(vector) != 3 or not all(math.isfinite(v) for v in vector):
+        raise JobError(f"{name} must be three finite numbers, got {value!r}")
+    return vector
+
+def normalize_job(params, meshes):
+    """
+    Checks a dict of job parameters and fills in the defaults.
+
+    Returns a hashable key (a sorted tuple of items) that identifies the
+    image: two requests with the same key produce the same PNG.
+    """
+    unknown = set(params) - set(DEFAULT_JOB) - {'mesh'}
+    if unknown:
+        raise JobError(f"unknown parameters: {', '.join(sorted(unknown))}")
+    job = dict(DEFAULT_JOB, mesh=next(iter(meshes)))
+    job.update(params)
+
+    if not isinstance(job['mesh'], str) or job['mesh'] not in meshes:
+        raise JobError(f"unknown mesh {job['mesh']!r}, the server has {', '.join(meshes)}")
+    for name in ('width', 'height'):
+        try:
+            job[name] = int(job[name])
+        except (TypeError, ValueError, OverflowError):
+            raise JobError(f"{name} must be an integer") from None
+        if not 1 <= job[name] <= MAX_SIZE:
+            raise JobError(f"{name} must be between 1 and {MAX_SIZE}")
+    for name in NUMBERS:
+        try:
+            job[name] = float(job[name])
+        except (TypeError, ValueError):
+            raise JobError(f"{name} must be a number") from None
+        if not math.isfinite(job[name]):
+            raise JobError(f"{name} must be finite")
+    if job['shininess'] < 0:
+        raise JobError("shininess must not be negative")
+    # Closer than the bounding sphere the camera sits inside the mesh
+    radius = meshes[job['mesh']].radius or 0.0
+    if job['distance'] <= 0 or job['distance'] < radius:
+        raise JobError(f"distance must be positive and at least the mesh radius {radius:g}")
+    for name in VECTORS:
+        job[name] = _vector(name, job[name])
+    if job['shading'] not in SHADING_MODES:
+        raise JobError(f"shading must be one of {', '.join(SHADING_MODES)}")
+    return tuple(sorted(job.items()))
+
+
+# === RESULT CACHE ===
+class LRUCache:
+    """ Byte-bounded least-recently-used map from job key to PNG bytes """
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._items:
+            self.size -= len(self._items.pop(key))
+        self._items[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._items)
+
+
+# === RENDER SERVICE ===
+class RenderService:
+    """
+    Resident meshes, a render thread pool and the result cache.
+
+    meshes maps the names clients use to loaded Mesh objects. Every pool
+    thread lazily builds its own Renderer per mesh, so frame buffers are
+    reused across jobs without being shared between threads. Each Renderer
+    only keeps the buffers of the last size it drew, so memory stays
+    bounded whatever sizes the clients ask for.
+    """
+    def __init__(self, meshes, workers=None, cache_bytes=DEFAULT_CACHE_BYTES, renderer_options=None):
+        self.meshes = meshes
+        self.renderer_options = dict({'max_targets': 1}, **(renderer_options or {}))
+        self.cache = LRUCache(cache_bytes)
+        self.stats = dict.fromkeys(('requests', 'hits', 'misses', 'joined', 'errors'), 0)
+        self._pool = ThreadPoolExecutor(max_workers=workers or default_workers(), thread_name_prefix='render')
+        self._local = threading.local()
+        self._inflight = {}
+
+    def _renderer(self, name, shading):
+        renderers = getattr(self._local, 'renderers', None)
+        if renderers is None:
+            renderers = self._local.renderers = {}
+        renderer = renderers.get((name, shading))
+        if renderer is None:
+            renderer = Renderer(self.meshes[name], None, shading=shading, **self.renderer_options)
+            renderers[name, shading] = renderer
+        return renderer
+
+    def render_png(self, key):
+        """ Renders one normalized job and encodes it; runs on a pool thread """
+        job = dict(key)
+        camera = Camera.turntable(job['width'], job['height'], job['angle'], job['distance'])
+        light = Light(job['light'], job['intensity'])
+        material = Material(job['diffuse'], job['specular'], job['shininess'])
+        # Encoded before this thread renders again, so the framebuffer needs no copy
+        image = self._renderer(job['mesh'], job['shading']).render(camera, [light], material=material, copy=False)
+        out = io.BytesIO()
+        Image.fromarray(image).save(out, format='PNG', compress_level=1)
+        return out.getvalue()
+
+    async def render(self, key):
+        """ PNG bytes and 'hit' / 'miss' / 'joined' for a normalized job """
+        self.stats['requests'] += 1
+        data = self.cache.get(key)
+        if data is not None:
+            self.stats['hits'] += 1
+            return data, 'hit'
+        # Identical jobs already being rendered are joined rather than queued again
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['joined'] += 1
+            return await asyncio.shield(future), 'joined'
+
+        self.stats['misses'] += 1
+        future = asyncio.get_running_loop().run_in_executor(self._pool, self.render_png, key)
+        self._inflight[key] = future
+        try:
+            data = await asyncio.shield(future)
+        finally:
+            del self._inflight[key]
+        self.cache.put(key, data)
+        return data, 'miss'
+
+    def snapshot(self):
+        return dict(self.stats, cached=len(self.cache), cache_bytes=self.cache.size,
+                    inflight=len(self._inflight), meshes=list(self.meshes))
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+# === HTTP ===
+async def _read_request(reader):
+    """ (method, path, query dict, body bytes) of one HTTP/1.x request, or None on EOF """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise JobError("malformed request line") from None
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = header.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            try:
+                length = int(value)
+            except ValueError:
+                raise JobError("Content-Length must be an integer") from None
+            if length < 0:
+                raise JobError("Content-Length must not be negative")
+    if length > MAX_BODY:
+        raise JobError("request body too large")
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    return method, url.path, dict(parse_qsl(url.query)), body
+
+def _response(status, content_type, body, headers=()):
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+              500: 'Internal Server Error'}[status]
+    head = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}", "Connection: close", *headers]
+    return ("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body
+
+async def _respond(service, method, path, query, body):
+    if path == '/stats':
+        return _response(200, 'application/json', json.dumps(service.snapshot()).encode())
+    if path != '/render':
+        return _response(404, 'text/plain', b"try /render or /stats\n")
+    if method == 'POST':
+        try:
+            params = json.loads(body or b'{}')
+        except ValueError:
+            raise JobError("body is not valid JSON") from None
+        if not isinstance(params, dict):
+            raise JobError("body must be a JSON object")
+    elif method == 'GET':
+        params = query
+    else:
+        return _response(405, 'text/plain', b"use GET or POST\n")
+    key = normalize_job(params, service.meshes)
+    data, source = await service.render(key)
+    return _response(200, 'image/png', data, [f"X-Cache: {source}"])
+
+async def handle_connection(service, reader, writer):
+    """ Serves one request per connection """
+    try:
+        request = await _read_request(reader)
+        if request is None:
+            return
+        reply = await _respond(service, *request)
+    except JobError as error:
+        service.stats['errors'] += 1
+        reply = _response(400, 'text/plain', f"{error}\n".encode())
+    except Exception as error:
+        service.stats['errors'] += 1
+        reply = _response(500, 'text/plain', f"{type(error).__name__}: {error}\n".encode())
+    try:
+        writer.write(reply)
+        await writer.drain()
+    finally:
+        writer.close()
+
+async def serve(service, host='127.0.0.1', port=DEFAULT_PORT, unix_path=None):
+    """ Runs the server until cancelled """
+    def handler(reader, writer):
+        return handle_connection(service, reader, writer)
+
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Serving {', '.join(service.meshes)} on {where}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+# === COMMAND LINE ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local render server keeping meshes resident")
+    parser.add_argument('meshes', nargs='+', metavar='OBJ', help='meshes to load; clients refer to them by path')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'TCP port (default: {DEFAULT_PORT})')
+    parser.add_argument('--unix', metavar='PATH', help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='render threads (default: all cores)')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_BYTES >> 20,
+                        help='size of the PNG result cache in MB (default: %(default)s)')
+    parser.add_argument('--no-lod', action='store_true', help='always render the full mesh')
+    args = parser.parse_args(argv)
+
+    meshes = {path: Mesh.load(path, lod=not args.no_lod) for path in args.meshes}
+    service = RenderService(meshes, args.workers, args.cache_mb << 20,
+                            renderer_options={'level_of_detail': not args.no_lod})
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+if __name__ == '__main__':
+    main()
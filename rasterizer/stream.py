@@ -0,0 +1,114 @@
+"""
+Streaming image writers.
+
+Images too large to hold in memory are written a band of rows at a time:
+the writer only needs the rows it is given, so memory stays bounded by the
+band height whatever the image size.
+
+    with open_stream_writer('out.png', width, height) as writer:
+        for rows in bands:           # (h, width, 3) uint8 arrays, top to bottom
+            writer.write_rows(rows)
+
+PNGStreamWriter emits IHDR up front, then IDAT chunks while zlib
+compresses, and IEND on close. RawStreamWriter writes a binary PPM (P6),
+which is the raw RGB rows behind a short text header.
+"""
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+IDAT_SIZE = 1 << 20  # compressed bytes per IDAT chunk
+
+
+# === WRITERS ===
+class _StreamWriter:
+    """ Shared row bookkeeping: rows must arrive top to bottom and add up to height """
+    def __init__(self, path, width, height):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._file = open(path, 'wb')
+
+    def write_rows(self, rows):
+        """ Appends an (h, width, 3) uint8 block of rows below the ones already written """
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        if rows.ndim != 3 or rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"rows must have shape (h, {self.width}, 3), got {rows.shape}")
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError(f"{self.rows_written + len(rows)} rows written to an image of height {self.height}")
+        self._write(rows)
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"only {self.rows_written} of {self.height} rows were written to {self.path}")
+            self._finish()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+class PNGStreamWriter(_StreamWriter):
+    """ 8-bit RGB PNG written incrementally; compress_level as in zlib (1 fast .. 9 small) """
+    def __init__(self, path, width, height, compress_level=6):
+        super().__init__(path, width, height)
+        self._zlib = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+        self._file.write(PNG_SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack('>I', len(data)) + kind + data +
+                         struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def _write(self, rows):
+        # Every scanline starts with its filter type; 0 stores the row unfiltered
+        lines = np.zeros((len(rows), 1 + 3 * self.width), dtype=np.uint8)
+        lines[:, 1:] = rows.reshape(len(rows), -1)
+        self._emit(self._zlib.compress(lines.tobytes()))
+
+    def _emit(self, data, flush=False):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= IDAT_SIZE or (flush and self._pending):
+            self._chunk(b'IDAT', b''.join(self._pending))
+            self._pending, self._pending_size = [], 0
+
+    def _finish(self):
+        self._emit(self._zlib.flush(), flush=True)
+        self._chunk(b'IEND', b'')
+
+class RawStreamWriter(_StreamWriter):
+    """ Binary PPM (P6): a text header followed by the raw RGB rows """
+    def __init__(self, path, width, height):
+        super().__init__(path, width, height)
+        self._file.write(f"P6\n{width} {height}\n255\n".encode('ascii'))
+
+    def _write(self, rows):
+        self._file.write(rows.tobytes())
+
+    def _finish(self):
+        pass
+
+def open_stream_writer(path, width, height):
+    """ PNGStreamWriter for .png paths, RawStreamWriter for .ppm / .raw """
+    if path.lower().endswith('.png'):
+        return PNGStreamWriter(path, width, height)
+    if path.lower().endswith(('.ppm', '.raw')):
+        return RawStreamWriter(path, width, height)
+    raise ValueError(f"cannot stream {path!r}: use a .png or .ppm path")
@@ -0,0 +1,111 @@
+"""
+Strip rendering for images larger than memory.
+
+The frame is rendered as horizontal bands of band_height rows. Projected
+triangles are binned once by the rows their bounding box spans; then every
+band is rasterized against band-sized color and depth buffers, which are
+reused for the next band, and its finished rows go straight to a stream
+writer (see stream.py). Peak memory depends on the band height and the
+mesh, not on the output resolution.
+"""
+import numpy as np
+
+from .deferred import GBuffer, draw_phong_deferred
+from .framebuffer import FrameBuffer
+from .instrument import stage
+from .raster import MAX_BATCH_FRAGMENTS, draw_colors_batch, draw_phong_batch
+from .shading import corner_colors
+
+DEFAULT_BAND_HEIGHT = 64
+
+
+# === BINNING ===
+def bin_bands(screen, height, band_height=DEFAULT_BAND_HEIGHT, subpixel_bits=None):
+    """
+    Splits the image rows into bands and assigns T projected triangles
+    ((T, 3, 2) screen array) to the bands their bounding box overlaps.
+
+    Returns a list of (y0, y1, indices) for every band top to bottom, with
+    rows y0 .. y1 - 1 and the overlapping triangles in submission order.
+    Bands without triangles are included, they still have rows to write.
+    """
+    screen = np.asarray(screen, dtype=np.int64)
+    band_count = -(-height // band_height)
+    if len(screen):
+        min_y = screen[:, :, 1].min(axis=1)
+        max_y = screen[:, :, 1].max(axis=1)
+        if subpixel_bits is not None:
+            min_y = min_y >> subpixel_bits
+            max_y = max_y >> subpixel_bits
+        b0 = np.maximum(min_y, 0) // band_height
+        b1 = np.minimum(max_y, height - 1) // band_height
+        counts = np.where(b1 >= b0, b1 - b0 + 1, 0)
+    else:
+        b0 = counts = np.zeros(0, dtype=np.int64)
+
+    # One (band, triangle) entry per overlapped band; the stable sort keeps submission order per band
+    tri = np.repeat(np.arange(len(screen)), counts)
+    band = np.repeat(b0, counts) + np.arange(len(tri)) - np.repeat(np.cumsum(counts) - counts, counts)
+    order = np.argsort(band, kind='stable')
+    band, tri = band[order], tri[order]
+    bounds = np.searchsorted(band, np.arange(band_count + 1))
+    return [(b * band_height, min((b + 1) * band_height, height), tri[bounds[b]:bounds[b + 1]])
+            for b in range(band_count)]
+
+
+# === STRIP DRAWING ===
+def draw_phong_strips(screen, verts, normals, width, height, material, light, writer,
+                      band_height=DEFAULT_BAND_HEIGHT, deferred=False, shading='phong', background=(0, 0, 0),
+                      max_fragments=MAX_BATCH_FRAGMENTS, subpixel_bits=None, instrument=None, colors=None):
+    """
+    Renders a width x height frame band by band into writer.
+
+    Takes the same (T, 3, 2) / (T, 3, 3) arrays as draw_phong_batch, for
+    the whole frame; writer is anything with write_rows, e.g. a
+    PNGStreamWriter. Each band draws its triangles, shifted into band
+    coordinates, with draw_phong_batch, draw_phong_deferred (deferred=True)
+    or, for shading='flat' / 'gouraud', draw_colors_batch on colors lit
+    once up front (or passed in as colors, see draw_batch), so the rows
+    match the same path on a full frame.
+    Returns the list of bands from bin_bands.
+    """
+    screen = np.asarray(screen, dtype=np.int64)
+    verts = np.asarray(verts)
+    normals = np.asarray(normals)
+    with stage(instrument, 'bin'):
+        bands = bin_bands(screen, height, band_height, subpixel_bits)
+    if shading == 'phong':
+        colors = None
+    elif colors is None:
+        colors = corner_colors(verts, normals, material, light, shading)
+        if instrument is not None:
+            instrument.count(shading_calls=colors.size // 3)
+    shift = 0 if subpixel_bits is None else subpixel_bits
+
+    framebuffer = FrameBuffer(width, min(band_height, height), background)
+    gbuffer = GBuffer(width, framebuffer.height) if deferred and colors is None else None
+    for y0, y1, indices in bands:
+        framebuffer.clear()
+        color_buffer = framebuffer.color_buffer[:y1 - y0]
+        z_buffer = framebuffer.z_buffer[:y1 - y0]
+        # Edge functions are translation invariant, so moving the origin to the band's top row is exact
+        band_screen = screen[indices] - (0, y0 << shift)
+        band_instrument = None if instrument is None else instrument.tile(0, y0, width, y1)
+        with stage(instrument, 'band', y=y0, triangles=len(indices)):
+            if len(indices) == 0:
+                pass
+            elif colors is not None:
+                draw_colors_batch(band_screen, verts[indices], colors[indices], color_buffer, z_buffer,
+                                  max_fragments, subpixel_bits, band_instrument)
+            elif deferred:
+                # The G-buffer only fits full bands; a shorter last band gets its own
+                draw_phong_deferred(band_screen, verts[indices], normals[indices], color_buffer, z_buffer,
+                                    material, light, gbuffer=gbuffer if y1 - y0 == gbuffer.height else None,
+                                    max_fragments=max_fragments, subpixel_bits=subpixel_bits,
+                                    instrument=band_instrument)
+            else:
+                draw_phong_batch(band_screen, verts[indices], normals[indices], color_buffer, z_buffer,
+                                 material, light, max_fragments, subpixel_bits, band_instrument)
+        with stage(instrument, 'encode', y=y0):
+            writer.write_rows(color_buffer)
+    return bands
@@ -0,0 +1,138 @@
+"""
+Sort-middle tiled rendering.
+
+Projected triangles are binned into square screen tiles by their bounding
+boxes. Every tile is then rasterized and shaded on its own, against the
+(tile, tile) slices of the depth and color buffers, by a thread pool. Tiles
+never share a pixel, so the threads need no locking, and the NumPy kernels
+release the GIL for most of their work.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .deferred import draw_phong_deferred
+from .instrument import stage
+from .parallel import default_workers
+from .raster import MAX_BATCH_FRAGMENTS, draw_colors_batch, draw_phong_batch
+from .shading import corner_colors
+
+DEFAULT_TILE_SIZE = 64
+
+
+# === BINNING ===
+class TileBins:
+    """
+    Triangle lists per screen tile.
+
+    tiles is a list of (x0, y0, x1, y1, indices): the tile's pixel rectangle
+    (x1, y1 exclusive) and the indices of the triangles overlapping it, in
+    submission order. Tiles without triangles are left out.
+    """
+    def __init__(self, tile_size, tiles):
+        self.tile_size = tile_size
+        self.tiles = tiles
+
+    @property
+    def references(self):
+        """ Total triangle entries over all tiles; a triangle spanning k tiles counts k times """
+        return sum(len(t[4]) for t in self.tiles)
+
+    def __len__(self):
+        return len(self.tiles)
+
+def bin_triangles(screen, width, height, tile_size=DEFAULT_TILE_SIZE, subpixel_bits=None):
+    """
+    Assigns T projected triangles ((T, 3, 2) screen array) to the tiles their
+    bounding box overlaps. Returns a TileBins.
+    """
+    screen = np.asarray(screen, dtype=np.int64)
+    tiles_x = -(-width // tile_size)
+    if len(screen) == 0:
+        return TileBins(tile_size, [])
+
+    min_xy = screen.min(axis=1)
+    max_xy = screen.max(axis=1)
+    if subpixel_bits is not None:
+        min_xy = min_xy >> subpixel_bits
+        max_xy = max_xy >> subpixel_bits
+    t0 = np.maximum(min_xy, 0) // tile_size
+    t1 = np.minimum(max_xy, (width - 1, height - 1)) // tile_size
+    span = np.where(t1 >= t0, t1 - t0 + 1, 0)
+    counts = span[:, 0] * span[:, 1]
+
+    # One (tile, triangle) entry per overlapped tile, like the candidate pixels in rasterize_batch
+    tri = np.repeat(np.arange(len(screen)), counts)
+    offsets = np.arange(len(tri)) - np.repeat(np.cumsum(counts) - counts, counts)
+    span_w = np.repeat(span[:, 0], counts)
+    tx = t0[tri, 0] + offsets % span_w
+    ty = t0[tri, 1] + offsets // span_w
+    tile_id = ty * tiles_x + tx
+
+    # Stable sort keeps submission order inside each tile, so depth ties resolve as before
+    order = np.argsort(tile_id, kind='stable')
+    tile_id, tri = tile_id[order], tri[order]
+    ids, starts = np.unique(tile_id, return_index=True)
+    tiles = []
+    for tid, indices in zip(ids, np.split(tri, starts[1:])):
+        y0, x0 = divmod(int(tid), tiles_x)
+        y0, x0 = y0 * tile_size, x0 * tile_size
+        tiles.append((x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height), indices))
+    return TileBins(tile_size, tiles)
+
+
+# === TILED DRAWING ===
+def draw_phong_tiled(screen, verts, normals, color_buffer, z_buffer, material, light, deferred=False,
+                     tile_size=DEFAULT_TILE_SIZE, workers=None, max_fragments=MAX_BATCH_FRAGMENTS,
+                     subpixel_bits=None, shading='phong', instrument=None, colors=None):
+    """
+    Tiled counterpart of draw_phong_batch with the same arguments and result.
+
+    Every tile runs draw_phong_batch (or draw_phong_deferred with
+    deferred=True) on its own triangles, shifted into tile coordinates, and
+    on views of color_buffer / z_buffer. workers sets the thread count
+    (default: all cores). With shading='flat' or 'gouraud' the colors are
+    lit once up front, or passed in as colors, and the tiles only draw them
+    with draw_colors_batch (see draw_batch).
+    instrument (an Instrumentation) gets one trace event per tile, on the
+    thread that drew it; a triangle is counted as rasterized (and drawn)
+    once per tile it overlaps. Returns the TileBins that were drawn.
+    """
+    screen = np.asarray(screen, dtype=np.int64)
+    verts = np.asarray(verts)
+    normals = np.asarray(normals)
+    height, width = z_buffer.shape
+    with stage(instrument, 'bin'):
+        bins = bin_triangles(screen, width, height, tile_size, subpixel_bits)
+    draw = draw_phong_deferred if deferred else draw_phong_batch
+    if shading == 'phong':
+        colors = None
+    elif colors is None:
+        colors = corner_colors(verts, normals, material, light, shading)
+        if instrument is not None:
+            instrument.count(shading_calls=colors.size // 3)
+    shift = 0 if subpixel_bits is None else subpixel_bits
+
+    def draw_tile(tile):
+        x0, y0, x1, y1, indices = tile
+        # Edge functions are translation invariant, so moving the origin to the tile corner is exact
+        tile_screen = screen[indices] - (x0 << shift, y0 << shift)
+        tile_instrument = None if instrument is None else instrument.tile(x0, y0, x1, y1)
+        with stage(instrument, 'tile', x=x0, y=y0, triangles=len(indices)):
+            if colors is not None:
+                draw_colors_batch(tile_screen, verts[indices], colors[indices], color_buffer[y0:y1, x0:x1],
+                                  z_buffer[y0:y1, x0:x1], max_fragments, subpixel_bits, tile_instrument)
+            else:
+                draw(tile_screen, verts[indices], normals[indices], color_buffer[y0:y1, x0:x1],
+                     z_buffer[y0:y1, x0:x1], material, light, max_fragments=max_fragments,
+                     subpixel_bits=subpixel_bits, instrument=tile_instrument)
+
+    workers = workers or default_workers()
+    if workers == 1:
+        for tile in bins.tiles:
+            draw_tile(tile)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() re-raises the first exception from a tile
+            list(pool.map(draw_tile, bins.tiles))
+    return bins
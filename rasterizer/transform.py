@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+
+
+# === TRANSFORMATIONS ===
+def build_transformation_matrix(angle_deg, scale_factor, translation_vec):
+    """ 4x4 model matrix: uniform scale, then rotation around Y, then translation (T * R * S) """
+    angle_rad = math.radians(angle_deg)
+    cos_a, sin_a = math.cos(angle_rad), math.sin(angle_rad)
+
+    S = np.diag([scale_factor, scale_factor, scale_factor, 1.0])
+    R = np.array([
+        [cos_a, 0, sin_a, 0],
+        [0,     1, 0,     0],
+        [-sin_a,0, cos_a, 0],
+        [0,     0, 0,     1]
+    ])
+    T = np.identity(4)
+    T[:3, 3] = translation_vec
+    return T @ R @ S
+
+def to_homogeneous(vertices):
+    """ (N, 3) points -> (N, 4) with w = 1, ready to be reused for every frame """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    return np.hstack((vertices[:, :3], np.ones((len(vertices), 1))))
+
+def transform_vertices(vertices, matrix):
+    """
+    Transforms all vertices with one (N, 4) @ (4, 4) product.
+
+    vertices is (N, 3) or already homogeneous (N, 4); returns (N, 3).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if vertices.shape[1] == 3:
+        vertices = to_homogeneous(vertices)
+    return vertices @ np.asarray(matrix, dtype=np.float64)[:3].T
+
+def max_scale(matrix):
+    """
+    Largest scale a 4x4 matrix, or a (K, 4, 4) stack, applies to lengths:
+    its largest column norm, exact for rotations with a uniform scale and
+    an upper bound for any other linear part.
+    """
+    return np.linalg.norm(np.asarray(matrix, dtype=np.float64)[..., :3, :3], axis=-2).max(axis=-1)
+
+
+# === PROJECTION ===
+def project_vertices(vertices, width, height, subpixel_bits=None):
+    """
+    Vectorized project_vertex: (N, 3) view-space points -> (N, 2) integer pixels.
+
+    Uses the same x / z, y / z pinhole mapping and truncation toward zero as
+    the scalar version, including the z == 0 guard. With subpixel_bits=n the
+    result is instead fixed point, rounded to 1 / 2**n of a pixel, for the
+    top-left rule rasterizer (see rasterize_batch).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    z = np.where(vertices[:, 2] == 0, 1e-5, vertices[:, 2])
+    x_proj = vertices[:, 0] / z
+    y_proj = vertices[:, 1] / z
+    x_screen = (x_proj + 1) * width / 2
+    y_screen = (1 - y_proj) * height / 2
+    screen = np.empty((len(vertices), 2), dtype=np.int64)
+    if subpixel_bits is None:
+        screen[:, 0] = np.trunc(x_screen)
+        screen[:, 1] = np.trunc(y_screen)
+    else:
+        screen[:, 0] = np.rint(x_screen * (1 << subpixel_bits))
+        screen[:, 1] = np.rint(y_screen * (1 << subpixel_bits))
+    return screen
@@ -0,0 +1,64 @@
+"""
+Z-buffered triangle lists.
+
+Draws scenes in the Lab_2 format, a list of [v1, v2, v3, color] with
+view-space vertices and one flat color per triangle, as one batch:
+projection, culling and rasterization run on arrays of every triangle and
+a z-buffer decides visibility per pixel. Unlike the painter's sort this is
+right for intersecting triangles, and a pixel is only written by a
+fragment that passes the depth test.
+"""
+from itertools import chain
+
+import numpy as np
+
+from .culling import cull_triangles
+from .raster import MAX_BATCH_FRAGMENTS, draw_colors_batch
+from .transform import project_vertices
+
+
+# === SCENE ARRAYS ===
+def triangle_arrays(triangles):
+    """ [(v1, v2, v3, color), ...] -> (T, 3, 3) vertices and (T, 3) colors """
+    # Streaming the numbers through fromiter is about 3x faster than np.array on the nested tuples
+    count = len(triangles)
+    verts = np.fromiter(chain.from_iterable(chain.from_iterable(tri[:3]) for tri in triangles),
+                        dtype=np.float64, count=9 * count)
+    colors = np.fromiter(chain.from_iterable(tri[3] for tri in triangles), dtype=np.uint8, count=3 * count)
+    return verts.reshape(-1, 3, 3), colors.reshape(-1, 3)
+
+
+# === DRAWING ===
+def draw_flat_triangles(verts, colors, color_buffer, z_buffer, backface=False, max_fragments=MAX_BATCH_FRAGMENTS,
+                        subpixel_bits=None, instrument=None):
+    """
+    Draws T flat-colored triangles into color_buffer with a z-test and
+    returns the CullStats of the batch.
+
+    verts is (T, 3, 3) view-space positions (camera at the origin looking
+    down +z, as in Lab_2), colors (T, 3). Vertices are projected like
+    Lab_2's perspective_project and to_screen, so with subpixel_bits=None
+    a triangle covers the same pixels as Lab_2's draw_triangle. Triangles
+    are double-sided unless backface=True. Depth is the view-space z
+    interpolated across the triangle; on equal depth the earlier triangle
+    in the list wins.
+    """
+    height, width = z_buffer.shape
+    verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3, 3)
+    colors = np.asarray(colors).reshape(-1, 3)
+    screen = project_vertices(verts.reshape(-1, 3), width, height, subpixel_bits).reshape(-1, 3, 2)
+    keep, stats = cull_triangles(screen, verts, width, height, backface, subpixel_bits)
+    if instrument is not None:
+        instrument.count_cull(stats)
+
+    # One color per triangle: only depth is interpolated across it
+    draw_colors_batch(screen[keep], verts[keep], colors[keep], color_buffer, z_buffer, max_fragments, subpixel_bits,
+                      instrument)
+    return stats
+
+def draw_triangle_list(triangles, color_buffer, z_buffer, backface=False, max_fragments=MAX_BATCH_FRAGMENTS,
+                       subpixel_bits=None, instrument=None):
+    """ draw_flat_triangles for a Lab_2 style list of [v1, v2, v3, color] """
+    verts, colors = triangle_arrays(triangles)
+    return draw_flat_triangles(verts, colors, color_buffer, z_buffer, backface, max_fragments, subpixel_bits,
+                               instrument)
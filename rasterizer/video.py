@@ -0,0 +1,82 @@
+import queue
+import threading
+
+from PIL import Image
+
+# Frames that may wait for the encoder before the renderer is made to wait
+DEFAULT_QUEUE_SIZE = 4
+
+_DONE = object()
+
+
+# === FRAME SINK ===
+class FrameWriter:
+    """
+    Streams finished framebuffers to a video file and/or PNG files.
+
+    write() hands the (H, W, 3) uint8 buffer to a background thread through a
+    bounded queue, so encoding overlaps with rendering the next frame while
+    at most queue_size frames are held in memory. ffmpeg and zlib release the
+    GIL, so the encoder thread runs alongside the NumPy rasterizer.
+
+    video_path   - output movie written with imageio (e.g. "animation.mp4"), or None
+    png_pattern  - format string for optional per-frame PNGs (e.g. "frame_{:03d}.png"), or None
+    """
+    def __init__(self, video_path=None, fps=20, png_pattern=None, queue_size=DEFAULT_QUEUE_SIZE):
+        if video_path is None and png_pattern is None:
+            raise ValueError("FrameWriter needs a video_path, a png_pattern or both")
+        self.video_path = video_path
+        self.fps = fps
+        self.png_pattern = png_pattern
+        self.frames_written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._writer = None
+        if video_path is not None:
+            import imageio.v2 as imageio
+            self._writer = imageio.get_writer(video_path, fps=fps)
+        self._thread = threading.Thread(target=self._run, name="FrameWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, color_buffer):
+        """ Queues one frame; blocks while the queue is full """
+        self._raise_if_failed()
+        self._queue.put((frame, color_buffer))
+
+    def close(self):
+        """ Flushes the queue, finishes the video file and re-raises any encoder error """
+        if self._thread.is_alive():
+            self._queue.put(_DONE)
+            self._thread.join()
+        self._raise_if_failed()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError("frame writer failed") from self._error
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                frame, color_buffer = item
+                if self._writer is not None:
+                    self._writer.append_data(color_buffer)
+                if self.png_pattern is not None:
+                    Image.fromarray(color_buffer).save(self.png_pattern.format(frame))
+                self.frames_written += 1
+        except Exception as error:
+            self._error = error
+            # Keep draining so a blocked write() can return and see the error
+            while self._queue.get() is not _DONE:
+                pass
+        finally:
+            if self._writer is not None:
+                self._writer.close()